@@ -1,5 +1,12 @@
+import os
 import numpy as np
-import matplotlib.pyplot as plt
+from plate_solver import convection_diffusion_coefficients, convection_diffusion_update, solve
+from sparse_solver import sparse_solve
+from sor import sor_solve
+from stretched import stretched_points, stretched_coefficients
+from checkpoint import Checkpointer, load_checkpoint, load_omega, same_params, warm_start
+from sweep import sweep, parameter_grid, print_table, plot_sweep
+from plotting import grid, iteration_times, decimate, Renderer
 
 #This code will find the final temperature distribution of a 2D square plate undergoing an unsteady convection diffusion equation  
 #the boundary conditions are such that the bottom row and the leftmost column of the plate is held steady at 1 C where C = Celsius 
@@ -15,8 +22,9 @@ dom_length = 1; #defines both the length and width of the 2D square plate (i.e.
 n_points = 34; #defines both the number of columns and rows for a 2d square plate
 h1 = dom_length/(n_points-1); #defines the length of the edge of each cell in the mesh
 #the value of h corresponds to delta x and delta y of the 2D square plate (i.e. domain)
-x = np.linspace(0,dom_length,n_points) #x coordinate of each point 
-y = np.linspace(0,dom_length,n_points) #y coordinate of each point 
+stretching = 0.0; #0 gives a uniform mesh, a value of 2 to 3 packs the points towards the edges of the plate where the gradients are steepest
+x = stretched_points(n_points,dom_length,stretching) #x coordinate of each point 
+y = stretched_points(n_points,dom_length,stretching) #y coordinate of each point 
 
 dt = 0.0001; #defines Delta t measured in seconds (s)
 #functionally this means how much time has elapsed following the completion of a single iteration 
@@ -32,52 +40,73 @@ P = (rho*u*h1)/gamma; #sets the Peclet number
 #steps 3 and 4 
 T = np.zeros((n_points,n_points)) #sets up a two 2d array that contain all zeros 
 #this also serves as a way to intialize the interior points of the domain and set the boundary condition for the top row and the rightmost column
-T_new = np.zeros((n_points,n_points)) #sets up a two 2d array that contain all zeros 
+#a second array for the new values is not needed here as solve sets one up itself
 
-T[0,:] = 1; #sets the boundary condition of the bottom row for y at a temperature of 1 C
-T[:,0] = 1; #sets the boundary condition of the leftmost column for y at a temperature of 1 C
-T_new[0,:] = 1; #sets the boundary condition of the bottom row for y_new at a temperature of 1 C
-T_new[:,0] = 1; #sets the boundary condition of the leftmost column for y at a temperature of 1 C
+T[0,:] = 1; #sets the boundary condition of the bottom row for T at a temperature of 1 C
+T[:,0] = 1; #sets the boundary condition of the leftmost column for T at a temperature of 1 C
 
 
 
 #steps 5 and 6 
-error = 1;  #initialize the variable error_mag (just to make sure its value is greater than error_req)
-error_req = 1e-6; # establishes the threshold value the error must fall below to break the following loop  
-error_track = []; #tracks how the error changes with time 
-iterations = 0; # initializes the variable 'iterations' as having a value of 0 
-#the variable 'iterations' is there to determine the number of cycles the code will have to do to reach a stable solution
-
-while error > error_req: # keeps doing the calculations until the error is less than the threshold value 
-    
-    # the range ensures that the for loop focuses on the points interior to the domain and does not modify the boundary conditions
-    for i in range(1,n_points-1): #this for loop acts on points interior to the domain along the x-axis
-        for j in range(1,n_points-1): #this for loop acts on points interior to the domain along the y-axis
-            #uses the governing equation to update y_new for points interior to the domain 
-            a_E = gamma - (rho*u*h1)/2; 
-            a_W = gamma + (rho*u*h1)/2; 
-            a_N = gamma - (rho*v*h1)/2; 
-            a_S = gamma + (rho*v*h1)/2; 
-            a_P =  (rho*u*h1)/2 - (rho*u*h1)/2 + (rho*v*h1)/2 - (rho*v*h1)/2 + gamma + gamma + gamma + gamma; 
-            T_new[i,j] = ((a_E*T[i+1,j]) + (a_W*T[i-1,j]) + (a_N*T[i,j+1]) + (a_S*T[i,j-1]))/a_P; 
-    
-    # increments the variable iterations by 1 after the for loop sucessfully updates all the points interior to the domain 
-    iterations = iterations + 1;
-    
-    error = 0; # resets the error to zero so that the error may be appropriately calculated
-    
-    # updates the error by summing the abosolute difference between the new and old values
-    for i in range(1,n_points-1): #this for loop acts on points interior to the domain along the x-axis
-        for j in range(1,n_points-1): #this for loop acts on points interior to the domain along the y-axis
-            error = error + abs(T[i,j] - T_new[i,j]); 
-    
-    # records the error in an array 
-    error_track.append(error) #adds an aditional position to the array error_track and slots the value of the error in that position 
-    
-    # updates the value of y by copying the values of y_new 
-    for i in range(1,n_points-1): #this for loop completes the command below for points interior to the domain
-        for j in range(1,n_points-1): #this for loop completes the command below for points interior to the domain
-            T[i,j] = T_new[i,j] #this transfers the value stored in y_new for particular set of indices to the same set of indices in y
+error_req = 1e-6; # establishes the threshold value the error must fall below to stop iterating  
+scheme = 'central'; #selects the differencing scheme: 'central', 'upwind', 'hybrid' or 'power_law'
+#central differencing oscillates or diverges once the Peclet number P passes 2, the other schemes stay stable on coarser meshes
+if stretching == 0:
+    coefficients = convection_diffusion_coefficients(gamma, rho, u, v, h1, scheme) #a_E, a_W, a_N, a_S and a_P are the same for every cell
+else:
+    coefficients = stretched_coefficients(x, y, gamma, rho, u, v, scheme) #one value of each coefficient per cell, as the cells differ in size
+#for a flow that changes over the plate gamma, rho, u and v can be given as functions of x and y (or arrays of values at each point)
+#to plate_solver.convection_diffusion_fields, e.g.
+#coefficients = convection_diffusion_fields(gamma, rho, lambda x, y: np.sin(np.pi*y), lambda x, y: -np.sin(np.pi*x), h1, n_points, scheme)
+#which works out one value of each coefficient per cell before the solve starts
+method = 'jacobi'; #selects how the problem is solved: 'jacobi', 'sor', 'lu', 'bicgstab' or 'gmres'
+#'sor' relaxes a single array in place with an over-relaxation factor worked out from the mesh and the coefficients
+#'lu', 'bicgstab' and 'gmres' solve the whole system of equations at once as a sparse matrix instead of relaxing it point by point 
+
+#checkpoints (only used by 'jacobi' and 'sor'): with checkpoint_file set, the progress is saved every checkpoint_every iterations
+#and if the file already exists the run carries on from where it was saved instead of starting again
+#a checkpoint saved with different parameters (e.g. another gamma or n_points) is only used as a warm start and is then overwritten by this run
+checkpoint_file = None; #e.g. 'convection.npz'
+checkpoint_every = 1000;
+#warm start: the interior of T starts from a stored solution (e.g. one saved for a nearby gamma, u and v or on a coarser mesh) instead of 0 C
+warm_start_file = None;
+output_dir = None; #set to a folder name for batch runs without a display: the plots are written there as png files instead of being shown
+#they are drawn by a background process while the sweep of step 8 runs, and matplotlib is only imported by that process
+params = {'gamma': gamma, 'rho': rho, 'u': u, 'v': v, 'n_points': n_points, 'scheme': scheme, 'stretching': stretching} #stored with the checkpoint
+
+iterations = 0
+error_track = []
+start_omega = None #the omega a resumed 'sor' run had reached
+resume = checkpoint_file is not None and os.path.exists(checkpoint_file)
+if resume and not same_params(load_checkpoint(checkpoint_file)[3], params):
+    print("the checkpoint " +checkpoint_file+ " was saved with different parameters, it is used as a warm start instead")
+    resume = False
+    warm_start_file = checkpoint_file
+if resume:
+    T, iterations, error_track, stored = load_checkpoint(checkpoint_file)
+    start_omega = load_omega(checkpoint_file)
+elif warm_start_file is not None:
+    T = warm_start(T, warm_start_file)
+checkpointer = Checkpointer(checkpoint_file, checkpoint_every, error_track, params) if checkpoint_file is not None else None
+
+if method == 'jacobi':
+    #solve keeps applying the governing equation to the points interior to the domain until the error is less than error_req
+    #error_track tracks how the error changes with time and iterations is the number of cycles needed to reach a stable solution
+    T, iterations, error_track = solve(T, lambda T, T_new: convection_diffusion_update(T, T_new, coefficients), error_req,
+                                       callback=checkpointer, iterations=iterations, error_track=error_track)
+elif method == 'sor':
+    #omega is the over-relaxation factor that was used
+    T, iterations, error_track, omega = sor_solve(T, coefficients, error_req, callback=checkpointer, iterations=iterations, error_track=error_track,
+                                              start_omega=start_omega)
+    print("the over-relaxation factor used was " +str(omega)+ " ")
+else:
+    #the LU factorization is kept, so solving again with different boundary values is much cheaper than the first solve
+    #error_track tracks the relative residual after each iteration of the sparse solver (a single entry for 'lu')
+    T, error_track = sparse_solve(T, coefficients, method)
+    iterations = len(error_track)
+
+if checkpointer is not None and method in ('jacobi', 'sor'):
+    checkpointer.finish(T, iterations) #the converged solution can be used to warm start later runs
 
 print("the number of cycles this problem required to converge to a solution is " +str(iterations)+ " ")
 time1 = iterations*dt;
@@ -87,72 +116,58 @@ print("the time this problem required to converge to a solution is " +str(time1)
 
 # Step 7 (Although not officially noted, this step is required to be able to present the final solution of the problem)
 
-iteratorArray1 = np.zeros((n_points,n_points)) #this creates an array of npoints where every term in the array is initialized as 0 
-
-#this for acts on all vertices marking the grid over the 2D plate (i.e. domain)
-for index3 in range(0,n_points):
-   iteratorArray1[index3,:] = index3 #this sets every value of each of the terms in array equal to its index (i.e. [0,1,2,..,n])
-   for index4 in range(0,n_points):
-       iteratorArray1[:,index4] = index4 #this sets every value of each of the terms in array equal to its index (i.e. [0,1,2,..,n]) 
-
-x1_dom = iteratorArray1[index3,:] * h1 # multiply all elements of the array by the length of the edge of a cell (i.e. Delta x)
-y1_dom = iteratorArray1[index4,:] * h1 # multiply all elements of the array by the length of the edge of a cell (i.e. Delta y)
-#The end result is that each position in the vector x_dom corresponds to a position along a row of the 2D square plate (i.e. domain) 
-#The end result is that each position in the vector y_dom corresponds to a position along a column of the 2D square plate (i.e. domain) 
-#in other words the result is a discretized version of points along the 2D square plate (i.e. domain)
+spacing = h1 if stretching == 0 else x #the spacing of the uniform mesh or the position of every point of the stretched mesh
+X, Y = grid(n_points, spacing) #the x and y coordinates of every point of the mesh (0, h1, 2h1, .. along each edge of a uniform plate)
 
-X, Y = np.meshgrid(x1_dom, y1_dom) #creates the mesh to be used 
-
-lst = np.zeros(iterations) #sets up an array that contain all zeros
-
-#sets the value found in array equal to its index where the index corresponds to a particular number of iterations
-for index3 in range(0,iterations):
-    lst[index3] = index3  
-    
-time = dt * (lst) # multiplies all elements in lst by the time it takes to complete a single iteration (dt). 
-#The end result is that each position in the array 'time' corresponds to the time it takes to complete a specific number of iterations 
-#said number of iterations is equal to the index of the array 'time' (for example t[9] is equal to the amount of time it takes to complete 9 iterations) 
+time = iteration_times(iterations, dt) #time[i] is the time it takes to complete i iterations (i*dt)
 
 #this graph is to show how quickly the error falls below the threshold value 
 #which is a proxy for how quickly the unsteady heat diffusion reaches a steady state solution 
-n = plt.scatter(time,error_track, color="red",s=1);
-plt.xlabel("Time (s)")
-plt.ylabel("error (no units)")
-plt.title("how error changes with respect to time")
-plt.show(n)
+#long error tracks are cut down to a few thousand points before plotting, keeping the largest and smallest error of each stretch of iterations
+renderer = Renderer(output_dir) if output_dir is not None else None
+if renderer is not None:
+    renderer.convergence('error', error_track, dt)
+else:
+    import matplotlib.pyplot as plt
+    time_plotted, error_plotted = decimate(time, error_track)
+    n = plt.scatter(time_plotted,error_plotted, color="red",s=1);
+    plt.xlabel("Time (s)")
+    plt.ylabel("error (no units)")
+    plt.title("how error changes with respect to time")
+    plt.show(n)
 
 
 
 # step 8 (this is not mentioned in the document but answers the second question posed in the poster)
 
-#the following set of arrays are data about how the 'time to converge' changes based on the value of the diffusion coefficient 
-gamma1 = [0.09,0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1]
-times2 = [0.1013,0.1145,0.2156,0.2636,0.2861,0.2976,0.3040,0.3079,0.3104,0.312,0.3131] #time to converge for varying values of the diffusion coefficient when u=v=1
-times3 = [0.0416,0.0479,0.1145,0.1732,0.2156,0.2443,0.2636,0.2768,0.2861,0.2921,0.2976] #time to converge for varying values of the diffusion coefficient when u=v=2
-times4 = [0.0239,0.0277,0.0697,0.1145,0.1554,0.1891,0.2156,0.236,0.2516,0.2636,0.273] #time to converge for varying values of the diffusion coefficient when u=v=3
-
-#the following set of arrays are a truncated form of the data above 
-gamma11 = [0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1]
-times21 = [0.1145,0.2156,0.2636,0.2861,0.2976,0.3040,0.3079,0.3104,0.312,0.3131] #time to converge for varying values of the diffusion coefficient when u=v=1
-times31 = [0.0479,0.1145,0.1732,0.2156,0.2443,0.2636,0.2768,0.2861,0.2921,0.2976] #time to converge for varying values of the diffusion coefficient when u=v=2
-times41 = [0.0277,0.0697,0.1145,0.1554,0.1891,0.2156,0.236,0.2516,0.2636,0.273] #time to converge for varying values of the diffusion coefficient when u=v=3
-
-# the following lines of code draw a graph that shows the relationship between the diffusion coefficient and the 'time to converge'
-w = plt.scatter(gamma11,times21,color="red", label = 'u = v = 1 m/s');
-f = plt.scatter(gamma11,times31,color="blue", label = 'u = v = 2 m/s');
-g = plt.scatter(gamma11,times41,color="purple", label = 'u = v = 3 m/s');
-plt.xlabel("diffusion coefficient (m^2/s)")
-plt.ylabel("Time to converge (s)")
-plt.title("how 'time to converge' changes with respect to "+str('\u0393')+" ")
-plt.legend(loc='lower right')
-plt.show()
+#the 'time to converge' is worked out for a range of values of the diffusion coefficient and for u = v = 1, 2 and 3 m/s
+#the cases are run in parallel on all cores and each result is kept in the folder sweep_cache, so running this again only computes new cases
+gamma1 = [0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1] #the values of the diffusion coefficient
+speeds = [1,2,3] #the values used for both u and v
+#the worker processes are started with 'fork' where it is available, so they do not run this file again
+#on Windows they re-import this file instead: steps 1 to 7 then run again in every worker and this guard only stops them starting a sweep of their own
+if __name__ == '__main__':
+    results = sweep(parameter_grid(gamma1, speeds, n_points=n_points, dt=dt))
+    print_table(results) #prints the time to converge for each case
+
+    # the following lines of code draw a graph that shows the relationship between the diffusion coefficient and the 'time to converge'
+    if renderer is not None:
+        renderer.sweep('sweep', results)
+    else:
+        plot_sweep(results)
+        plt.show()
 
 #plots the countour plot for the stable solution 
-m = plt.contourf(X, Y, T,20,cmap = 'plasma'); 
-cbar = plt.colorbar(m)
-plt.xlabel("Length of the plate along the x-axis (m)")
-plt.ylabel("Length of the plate along the y-axis (m)")
-plt.title("The temperature distribution where gamma is " +str(time1)+" s")
+title = "The temperature distribution where gamma is " +str(time1)+" s"
+if renderer is not None:
+    renderer.contour('temperature', T, spacing, title)
+    renderer.close() #waits for every plot to be written
+else:
+    m = plt.contourf(X, Y, T,20,cmap = 'plasma'); 
+    cbar = plt.colorbar(m)
+    plt.xlabel("Length of the plate along the x-axis (m)")
+    plt.ylabel("Length of the plate along the y-axis (m)")
+    plt.title(title)
 
 
 
@@ -1,5 +1,11 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from plate_solver import diffusion_update, solve
+from multigrid import multigrid_solve
+from spectral import spectral_solve
+from adaptive import AdaptivePlate
+from sor import sor_solve, diffusion_coefficients
+from parallel import parallel_solve, parallel_sor_solve
+from plotting import grid, Renderer
 
 #This code will find the final temperature distribution of a 2D square plate undergoing steady state heat diffusion 
 #the boundary conditions are such that the bottom row of the plate is held steady at 1 C where C = Celsius 
@@ -21,42 +27,58 @@ h = dom_size/(npoints-1); #defines the length of the edge of each cell in the me
 
 #step 3 and 4 
 y = np.zeros((npoints,npoints)) #sets up a two 2d array that contain all zeros 
-#this also serves as a way to intialize the interior points of the domain and set the boundary condition for the top row, leftmost column, and the rightmost column
-y_new = np.zeros((npoints,npoints)) #sets up a two 2d array that contain all zeros
+#this also serves as a way to intialize the interior points of the domain and set the boundary condition for the top row and the rightmost column
+#a second array for the new values is not needed here as solve sets one up itself
 
 y[0,:] = 1 #sets the boundary condition of the bottom row for y at a temperature of 1 C
-y[:,0] = 1 
-y_new[0,:] = 1 #sets the boundary condition of the bottom row for y_new at a temperature of 1 C
-y_new[:,0] = 1 
+y[:,0] = 1 #sets the boundary condition of the leftmost column for y at a temperature of 1 C
 
 #step 5 and 6 
-error_mag = 1; #initialize the variable error_mag (just to make sure its value is greater than error_req)
-error_req = 1e-6; # establishes the threshold value the error must fall below to break the following loop  
-iterations = 0; # initializes the variable iterations as having a value of 0 
-#the variable iterations is there to determine the number of cycles the code will have to do to reach a stable solution
-
-while (error_mag > error_req): # keeps doing the calculations until the error is less than the threshold value 
-    
-    # the range ensures that the for loop focuses on the points interior to the domain and does not modify the boundary conditions
-    for index1 in range(1,npoints-1): #this for loop acts on points interior to the domain along the x-axis
-        for index2 in range(1,npoints-1): #this for loop acts on points interior to the domain along the y-axis
-            y_new[index1,index2] = 0.25*(y[index1-1,index2] + y[index1+1,index2] +y[index1,index2-1] + y[index1,index2+1])
-            #uses the governing equation to update y_new for points interior to the domain 
-    
-    # increments the variable iterations by 1 after the for loop sucessfully updates all the points interior to the domain 
-    iterations = iterations + 1
-        
-    error_mag = 0; # resets the error to zero so that the error may be appropriately calculated
-    
-    # updates the error by summing the abosolute difference between the new and old values
-    for index1 in range(1,npoints-1): #this for loop acts on points interior to the domain along the x-axis
-        for index2 in range(1,npoints-1): #this for loop acts on points interior to the domain along the y-axis
-            error_mag = error_mag + (abs(y[index1,index2]-y_new[index1,index2]))
-        
-    # updates the value of y by copying the values of y_new 
-    for index1 in range(1,npoints-1): #this for loop completes the command below for points interior to the domain
-        for index2 in range(1,npoints-1): #this for loop completes the command below for points interior to the domain
-            y[index1,index2] = y_new[index1,index2] # this transfers the value stored in y_new for particular set of indices to the same set of indices in y
+error_req = 1e-6; # establishes the threshold value the error must fall below to stop iterating  
+method = 'jacobi'; #selects how the problem is solved: 'jacobi', 'sor', 'multigrid', 'spectral' or 'adaptive'
+#sor updates a single array in place with an over-relaxation factor worked out from the size of the mesh, it needs roughly npoints times fewer cycles than jacobi
+workers = 1; #the number of cores used by 'jacobi' and 'sor', each core works on its own strip of the plate
+#multigrid converges in the same handful of cycles whatever the size of the mesh when npoints is 2^k + 1 (e.g. 33, 129, 4097)
+#for other sizes it can only coarsen part of the way and solves the coarsest mesh directly, which gets slower as that mesh gets bigger
+#with npoints = 34 (npoints-1 is odd) it cannot coarsen at all, so 'multigrid' runs 0 cycles and is just 'spectral'
+#spectral solves the problem exactly in one step with sine transforms (no iterations), it is the fastest for large meshes
+#adaptive refines the mesh only where the temperature changes steeply (the corners where the 1 C and 0 C edges meet)
+levels = 3; #the number of times 'adaptive' may halve the spacing of the mesh
+output_dir = None; #set to a folder name for batch runs without a display: the plot is written there as a png file instead of being shown
+#matplotlib is then only imported by the background process that draws it
+
+if method == 'multigrid':
+    #multigrid_solve carries out V-cycles until the sum of the changes a single Jacobi sweep would make is less than error_req (as for jacobi)
+    #residual_history tracks how the residual changes with each cycle and solve_time is the time to solution in seconds
+    y, iterations, residual_history, solve_time = multigrid_solve(y, h, error_req=error_req)
+    print("the residual after each cycle was " +str(residual_history)+ " ")
+    print("the time this problem required to reach a solution is " +str(solve_time)+ "s")
+elif method == 'spectral':
+    #the boundary values are moved onto the right hand side and the system is solved with a DST-I, solve_time is the time to solution in seconds
+    y, solve_time = spectral_solve(y, h)
+    iterations = 1
+    print("the time this problem required to reach a solution is " +str(solve_time)+ "s")
+elif method == 'adaptive':
+    #the plate is solved, the cells with steep gradients are covered by patches with half the spacing and solved again, levels times over
+    #iterations is the number of cycles through the patches, y holds the solution at the points of the original mesh
+    plate = AdaptivePlate(y, h).adapt(levels)
+    y = plate.sample(0)
+    iterations = plate.iterations
+    print("the refined mesh has " +str(plate.cells)+ " cells against " +str(((npoints-1)*2**(len(plate.levels)-1))**2)+ " for a uniform mesh as fine")
+elif method == 'sor':
+    #omega is the over-relaxation factor that was used
+    if workers > 1:
+        y, iterations, error_track, omega = parallel_sor_solve(y, diffusion_coefficients, error_req, workers=workers)
+    else:
+        y, iterations, error_track, omega = sor_solve(y, diffusion_coefficients, error_req)
+    print("the over-relaxation factor used was " +str(omega)+ " ")
+else:
+    #solve keeps applying the governing equation to the points interior to the domain until the error is less than error_req
+    #iterations is the number of cycles the code had to do to reach a stable solution
+    if workers > 1:
+        y, iterations, error_track = parallel_solve(y, diffusion_update, error_req, workers=workers)
+    else:
+        y, iterations, error_track = solve(y, diffusion_update, error_req)
 
 print("the number of cycles this problem required to converge to a solution is " +str(iterations)+ " ")
 
@@ -64,33 +86,19 @@ print("the number of cycles this problem required to converge to a solution is "
 
 # Step 7 (Although not officially noted, this step is required to be able to present the final solution of the problem)
 
-iteratorArray1 = np.zeros((npoints,npoints)) #this creates an array of npoints where every term in the array is initialized as 0 
+title = "The temperature distribution at "+str(iterations*0.0001)+"s"
 
-#this for acts on all vertices marking the grid over the 2D plate (i.e. domain)
-for index3 in range(0,npoints):
-   iteratorArray1[index3,:] = index3 #this sets every value of each of the terms in array equal to its index (i.e. [0,1,2,..,n]) 
-   for index4 in range(0,npoints):
-       iteratorArray1[:,index4] = index4 #this sets every value of each of the terms in array equal to its index (i.e. [0,1,2,..,n]) 
+if output_dir is not None:
+    with Renderer(output_dir) as renderer: #waits for the file to be written when the block ends
+        renderer.contour('temperature', y, h, title)
+else:
+    import matplotlib.pyplot as plt
+    X, Y = grid(npoints, h) #the x and y coordinates of every point of the mesh (0, h, 2h, .. along each edge of the plate)
 
-x_dom = iteratorArray1[index3,:] * h # multiply all elements of the array by the length of the edge of a cell (i.e. Delta x)
-y_dom = iteratorArray1[index4,:] * h # multiply all elements of the array by the length of the edge of a cell (i.e. Delta y)
-#The end result is that each position in the vector x_dom corresponds to a position along a row of the 2D square plate (i.e. domain) 
-#The end result is that each position in the vector y_dom corresponds to a position along a column of the 2D square plate (i.e. domain) 
-#in other words the result is a discretized version of points along the 2D square plate (i.e. domain)
-
-X, Y = np.meshgrid(x_dom, y_dom)
-
-plt.contourf(X, Y, y,20,cmap = 'plasma'); #contour plot of how temperature varies with location 
-plt.xlabel("Length of the plate along the x-axis (m)")
-plt.ylabel("Length of the plate along the y-axis (m)")
-plt.title("The temperature distribution at "+str(iterations*0.0001)+"s")
-plt.colorbar()
+    plt.contourf(X, Y, y,20,cmap = 'plasma'); #contour plot of how temperature varies with location 
+    plt.xlabel("Length of the plate along the x-axis (m)")
+    plt.ylabel("Length of the plate along the y-axis (m)")
+    plt.title(title)
+    plt.colorbar()
 
 print(iterations*0.0001)
-
-
-
-
-
-
-
@@ -0,0 +1,285 @@
+import numpy as np
+from spectral import spectral_solve
+
+#This module solves the steady state heat diffusion problem of '2D steady state diffusion.py' on a block-structured adaptively refined mesh
+#the plate starts as one uniform mesh (level 0), the cells where the temperature changes steeply are flagged and covered by
+#rectangular patches with half the spacing (level 1), the same is done inside those patches for level 2 and so on
+#so the points end up packed around the corners where a 1 C edge meets a 0 C edge while the rest of the plate keeps the coarse mesh
+#
+#the mesh of each patch is cut into blocks of 'block' by 'block' cells and a block is refined if any of its cells is flagged:
+#   'gradient' - the temperature changes by more than tolerance across the cell
+#   'residual' - interpolating the patch onto a mesh with half the spacing leaves a residual (the change one Jacobi sweep would make) larger than tolerance
+#neighbouring flagged blocks are merged into rectangles and every rectangle is grown by one cell on each side, so patches next to each other overlap
+#
+#coarse/fine interfaces: the edge of a patch takes its values from the patch it lies in (cubic interpolation along the edge of the coarse mesh),
+#or from a neighbouring patch of the same level where the edge runs through that patch, or from the boundary conditions on the edges of the plate
+#in return each fine patch corrects the equation of the coarse patch under it (a tau correction, as in the full approximation scheme of multigrid),
+#so the coarse solution agrees with the fine one wherever the plate is refined and the coarse mesh feels the better answer near the corners
+#every patch is a uniform rectangle, so each one is solved directly with spectral.spectral_solve, and the levels are cycled until nothing changes
+#
+#   plate = AdaptivePlate(y, h).adapt(levels=3)
+#   y_fine = plate.sample(3) #the solution on the uniform mesh of level 3 (for plotting or checking), each patch fills in its own part
+
+
+
+#one uniform rectangle of points of one level
+#(i0, j0) is the position of its first point counted in points of that level, h is the spacing of that level
+class Patch:
+
+    def __init__(self, level, i0, j0, y, h, parent=None):
+        self.level = level
+        self.i0 = i0
+        self.j0 = j0
+        self.y = y
+        self.h = h
+        self.parent = parent
+        self.f = np.zeros_like(y) #the source term, including the tau correction from the finer patches inside this one
+
+    @property
+    def i1(self):
+        return self.i0 + self.y.shape[0] - 1 #the position of the last point
+
+    @property
+    def j1(self):
+        return self.j0 + self.y.shape[1] - 1
+
+    @property
+    def cells(self):
+        return (self.y.shape[0] - 1)*(self.y.shape[1] - 1)
+
+    #whether the point (i, j) of this level lies strictly inside the patch (not on its edge)
+    def inside(self, i, j):
+        return (self.i0 < i) & (i < self.i1) & (self.j0 < j) & (j < self.j1)
+
+
+
+#bilinear interpolation of an (nx, ny) array onto the (2nx-1, 2ny-1) points of a mesh with half the spacing
+def prolong(yc):
+    nx, ny = yc.shape
+    y = np.zeros((2*nx-1, 2*ny-1))
+    y[::2,::2] = yc
+    y[1::2,::2] = 0.5*(yc[:-1,:] + yc[1:,:])
+    y[::2,1::2] = 0.5*(yc[:,:-1] + yc[:,1:])
+    y[1::2,1::2] = 0.25*(yc[:-1,:-1] + yc[1:,:-1] + yc[:-1,1:] + yc[1:,1:])
+    return y
+
+
+#the values halfway between the points of a line of values, cubic where there are two points on each side and linear at the ends
+def midpoints(line):
+    mid = 0.5*(line[:-1] + line[1:])
+    if len(line) >= 4:
+        mid[1:-1] = (9*(line[1:-2] + line[2:-1]) - (line[:-3] + line[3:]))/16
+    return mid
+
+
+#the change one Jacobi sweep would make to each interior point of y (the residual of the five point equation times h^2/4)
+def jacobi_change(y, f, h):
+    r = np.zeros_like(y)
+    r[1:-1,1:-1] = (y[:-2,1:-1] + y[2:,1:-1] + y[1:-1,:-2] + y[1:-1,2:] - 4*y[1:-1,1:-1] + h*h*f[1:-1,1:-1])/4
+    return r
+
+
+#merges the flagged entries of a boolean array into rectangles, returns them as (a0, a1, b0, b1) with a1 and b1 one past the end
+def rectangles(flags):
+    flags = flags.copy()
+    found = []
+    while flags.any():
+        a0, b0 = np.argwhere(flags)[0]
+        b1 = b0
+        while b1 < flags.shape[1] and flags[a0,b1]:
+            b1 = b1 + 1
+        a1 = a0 + 1
+        while a1 < flags.shape[0] and flags[a1,b0:b1].all():
+            a1 = a1 + 1
+        flags[a0:a1,b0:b1] = False
+        found.append((a0, a1, b0, b1))
+    return found
+
+
+
+class AdaptivePlate:
+
+    #y is the plate on the level 0 mesh with its boundary conditions and h is its spacing (the plate does not have to be square)
+    #the temperature along each edge of the plate between the points of y is interpolated from the points of that edge (not counting the corners),
+    #boundary may be given as a function boundary(x, y) to set the temperature of the edges exactly at every level instead (the edges of y are then set from it too)
+    #f is an optional source term, a number or a function f(x, y) (see multigrid.py for the form of the equation)
+    def __init__(self, y, h, boundary=None, f=None, block=8):
+        y = np.array(y, dtype=np.float64, copy=True)
+        self.h = h
+        self.edges = y
+        self.boundary = boundary
+        self.source = f
+        self.block = block
+        self.shape = y.shape
+        if boundary is not None:
+            i, j = np.indices(y.shape)
+            edge = (i == 0) | (i == y.shape[0]-1) | (j == 0) | (j == y.shape[1]-1)
+            y[edge] = self.edge_values(0, i[edge], j[edge])
+        self.levels = [[Patch(0, 0, 0, y, h)]]
+        self.levels[0][0].f = self.source_values(0, 0, 0, y.shape)
+        self.iterations = 0
+
+
+    #the number of points along each edge of the whole plate at a level
+    def size(self, level):
+        return tuple((n - 1)*2**level + 1 for n in self.shape)
+
+
+    #the source term at the points of a patch of the given level, position and shape
+    def source_values(self, level, i0, j0, shape):
+        if self.source is None:
+            return np.zeros(shape)
+        h = self.h/2**level
+        if callable(self.source):
+            return np.array(np.broadcast_to(self.source(h*np.arange(i0, i0 + shape[0])[:,None], h*np.arange(j0, j0 + shape[1])[None,:]), shape), dtype=np.float64)
+        return np.full(shape, float(self.source))
+
+
+    #the temperature of the edges of the plate at the points (i, j) of a level that lie on them
+    def edge_values(self, level, i, j):
+        nx, ny = self.size(level)
+        if self.boundary is not None:
+            h = self.h/2**level
+            return np.broadcast_to(self.boundary(h*i, h*j), np.shape(i)).astype(np.float64)
+        scale = 2.0**level
+        e = self.edges
+        #each edge is interpolated along its own points, so the temperature jumps at the corner of the plate and not halfway along the last cell
+        values = np.where(i == 0, np.interp(j/scale, np.arange(1, e.shape[1]-1), e[0,1:-1]),
+                 np.where(i == nx-1, np.interp(j/scale, np.arange(1, e.shape[1]-1), e[-1,1:-1]),
+                 np.where(j == 0, np.interp(i/scale, np.arange(1, e.shape[0]-1), e[1:-1,0]), np.interp(i/scale, np.arange(1, e.shape[0]-1), e[1:-1,-1]))))
+        corner = ((i == 0) | (i == nx-1)) & ((j == 0) | (j == ny-1))
+        return np.where(corner, e[np.where(i == 0, 0, -1), np.where(j == 0, 0, -1)], values)
+
+
+    #fills in the edge of a patch from the plate's boundary conditions, a neighbouring patch of the same level or the coarse patch under it
+    def set_edges(self, patch):
+        nx, ny = self.size(patch.level)
+        y = patch.y
+        ring = np.zeros(y.shape, dtype=bool)
+        ring[0,:] = ring[-1,:] = ring[:,0] = ring[:,-1] = True
+        i, j = np.indices(y.shape)
+        i, j = i + patch.i0, j + patch.j0 #the position of every point of the patch on the mesh of its level
+        on_plate_edge = ring & ((i == 0) | (i == nx-1) | (j == 0) | (j == ny-1))
+
+        #the coarse patch under this one, interpolated along the lines of the coarse mesh the edges of this patch run along
+        parent = patch.parent
+        coarse = parent.y[patch.i0//2 - parent.i0:patch.i1//2 - parent.i0 + 1, patch.j0//2 - parent.j0:patch.j1//2 - parent.j0 + 1]
+        for side, line in ((np.s_[0,:], coarse[0,:]), (np.s_[-1,:], coarse[-1,:]), (np.s_[:,0], coarse[:,0]), (np.s_[:,-1], coarse[:,-1])):
+            fine = np.empty(2*len(line) - 1)
+            fine[::2] = line
+            fine[1::2] = midpoints(line)
+            y[side] = fine
+
+        #a neighbouring patch of the same level has better values where the edge runs through it
+        for other in self.levels[patch.level]:
+            if other is patch:
+                continue
+            take = ring & ~on_plate_edge & other.inside(i, j)
+            if take.any():
+                y[take] = other.y[i[take] - other.i0, j[take] - other.j0]
+
+        y[on_plate_edge] = self.edge_values(patch.level, i[on_plate_edge], j[on_plate_edge])
+
+
+    #the source term of a patch with the tau correction from every finer patch inside it:
+    #at the points of the patch lying strictly inside a finer patch the equation is replaced by the coarse equation of the finer solution
+    def corrected_source(self, patch):
+        f = patch.f.copy()
+        if patch.level + 1 < len(self.levels):
+            h = patch.h
+            for child in self.levels[patch.level + 1]:
+                if child.parent is not patch:
+                    continue
+                v = child.y[::2,::2] #the points of the finer patch that are also points of this one
+                a0, b0 = child.i0//2 - patch.i0, child.j0//2 - patch.j0
+                f[a0+1:a0+v.shape[0]-1, b0+1:b0+v.shape[1]-1] = (4*v[1:-1,1:-1] - v[:-2,1:-1] - v[2:,1:-1] - v[1:-1,:-2] - v[1:-1,2:])/(h*h)
+        return f
+
+
+    #cycles through the levels (coarse to fine) solving every patch until the largest change of any point in a cycle is less than error_req
+    #returns the largest change of each cycle
+    def solve(self, error_req=1e-10, max_iterations=100):
+        history = []
+        for _ in range(max_iterations):
+            change = 0.0
+            for level in self.levels:
+                for patch in level:
+                    if patch.parent is not None:
+                        self.set_edges(patch)
+                    old = patch.y.copy()
+                    patch.y[...] = spectral_solve(patch.y, patch.h, self.corrected_source(patch))[0]
+                    change = max(change, float(np.max(np.abs(patch.y - old))))
+            self.iterations = self.iterations + 1
+            history.append(change)
+            if change < error_req:
+                break
+        return history
+
+
+    #flags the cells of a patch for refinement, returns a boolean array with one entry per cell
+    def flag(self, patch, criterion='gradient', tolerance=0.05):
+        y = patch.y
+        if criterion == 'gradient':
+            jumps = np.maximum(np.maximum(np.abs(y[1:,:-1] - y[:-1,:-1]), np.abs(y[1:,1:] - y[:-1,1:])),
+                               np.maximum(np.abs(y[:-1,1:] - y[:-1,:-1]), np.abs(y[1:,1:] - y[1:,:-1])))
+            return jumps > tolerance
+        if criterion == 'residual':
+            fine = prolong(y)
+            change = np.abs(jacobi_change(fine, self.source_values(patch.level + 1, 2*patch.i0, 2*patch.j0, fine.shape), patch.h/2))
+            #the largest change of the finer points in (or on the edge of) each cell
+            return np.maximum(np.maximum(change[0:-1:2,0:-1:2], change[1::2,1::2]), np.maximum(change[2::2,2::2], np.maximum(change[1::2,0:-1:2], change[0:-1:2,1::2]))) > tolerance
+        raise ValueError("criterion must be 'gradient' or 'residual', not "+repr(criterion))
+
+
+    #adds a finer level with patches over the flagged blocks of the finest level, returns the number of new patches
+    def refine(self, criterion='gradient', tolerance=0.05):
+        b = self.block
+        new = []
+        for patch in self.levels[-1]:
+            cells = self.flag(patch, criterion, tolerance)
+            nbx, nby = -(-cells.shape[0]//b), -(-cells.shape[1]//b)
+            blocks = np.zeros((nbx, nby), dtype=bool)
+            for a in range(nbx):
+                for c in range(nby):
+                    blocks[a,c] = cells[a*b:(a+1)*b, c*b:(c+1)*b].any()
+            for a0, a1, b0, b1 in rectangles(blocks):
+                #the rectangle of cells grown by one cell on each side (kept inside the patch), as points of the patch
+                p0, p1 = max(a0*b - 1, 0), min(a1*b + 1, cells.shape[0])
+                q0, q1 = max(b0*b - 1, 0), min(b1*b + 1, cells.shape[1])
+                i0, j0 = 2*(patch.i0 + p0), 2*(patch.j0 + q0)
+                y = prolong(patch.y[p0:p1+1, q0:q1+1]) #the starting guess
+                child = Patch(patch.level + 1, i0, j0, y, patch.h/2, patch)
+                child.f = self.source_values(child.level, i0, j0, y.shape)
+                new.append(child)
+        if new:
+            self.levels.append(new)
+        return len(new)
+
+
+    #solves the plate, then keeps adding levels where they are flagged and solving again, up to 'levels' levels of refinement
+    def adapt(self, levels=3, criterion='gradient', tolerance=0.05, error_req=1e-10):
+        self.solve(error_req)
+        for _ in range(levels):
+            if self.refine(criterion, tolerance) == 0:
+                break
+            self.solve(error_req)
+        return self
+
+
+    #the total number of cells of every patch (cells covered by patches of several levels are counted once per level)
+    @property
+    def cells(self):
+        return sum(patch.cells for level in self.levels for patch in level)
+
+
+    #the solution on the uniform mesh of a level: the coarser solution interpolated onto that mesh, overwritten by every patch where there is one
+    #the result has (npoints-1)*2^level + 1 points along each edge, so only ask for the finer levels of small plates
+    def sample(self, level=None):
+        level = len(self.levels) - 1 if level is None else level
+        y = self.levels[0][0].y.copy()
+        for l in range(1, level + 1):
+            y = prolong(y)
+            if l < len(self.levels):
+                for patch in self.levels[l]:
+                    y[patch.i0:patch.i1+1, patch.j0:patch.j1+1] = patch.y
+        return y
@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import tracemalloc
+import numpy as np
+from plate_solver import diffusion_update, heat_update, convection_diffusion_coefficients, convection_diffusion_fields, convection_diffusion_update, solve
+from multigrid import multigrid_solve
+from spectral import spectral_solve
+from sparse_solver import sparse_solve, cached_lu
+from implicit import implicit_update
+from sor import sor_solve, diffusion_coefficients
+from parallel import parallel_solve, parallel_sor_solve
+from stretched import stretched_points, stretched_coefficients
+
+#This module measures how long each solver takes on the three plate problems as the mesh gets finer
+#   'steady'      - the plate of '2D steady state diffusion.py' (bottom row and leftmost column at 1 C)
+#   'unsteady'    - the plate of '2D unsteady heat diffusion.py' (bottom row at 1 C) run until it reaches a steady state
+#   'convection'  - the plate of '2D steady convection diffusion.py' with gamma = 1 and u = v = 1 m/s
+#for each run it records the iterations to converge, the wall time, the peak memory allocated and checksums of the final field
+#the peak memory is only traced in this process, so it is recorded as nan for the parallel methods (their plate is in shared memory and updated by worker processes)
+#runs of the 'steady' problem also record exact_error, the largest difference from the exact solution of the five point system (found with spectral.py)
+#the parallel methods use every core (one worker process per core)
+#the results can be stored as a baseline and later runs compared against it, any slowdown or change in the answer is flagged
+#each case is run 3 times by default and the shortest time kept, a single run is too noisy to compare against a baseline
+#
+#usage:
+#   python benchmark.py                                     runs everything and prints a table
+#   python benchmark.py --problems steady --sizes 34 129    runs a subset
+#   python benchmark.py --save-baseline                     stores the results in benchmark_baseline.json
+#   python benchmark.py --compare                           compares against benchmark_baseline.json (the exit status is 1 if anything was flagged)
+#   python benchmark.py --check-parallel                    checks that the parallel solvers give the same answers as the serial ones
+
+default_sizes = (20, 34, 65, 129, 257, 513, 1025, 2049) #2^k + 1 points gives multigrid its full grid hierarchy
+error_req = 1e-6
+dom_size = 1
+default_repeat = 3 #the number of times each case is run, the shortest wall time is kept
+
+
+
+#the starting field of each problem
+def plate(problem, npoints):
+    y = np.zeros((npoints,npoints))
+    y[0,:] = 1 #the bottom row is held at a temperature of 1 C
+    if problem != 'unsteady':
+        y[:,0] = 1 #the leftmost column is held at a temperature of 1 C
+    return y
+
+
+#Delta t of the unsteady runs: the script's value where it is stable, otherwise just inside the stability limit of the explicit step
+def explicit_dt(npoints):
+    h = dom_size/(npoints-1)
+    return min(0.0001, 0.2*h*h)
+
+
+def run_jacobi(npoints):
+    y, iterations, error_track = solve(plate('steady', npoints), diffusion_update, error_req)
+    return y, iterations
+
+
+def run_multigrid(npoints):
+    y, cycles, residual_history, solve_time = multigrid_solve(plate('steady', npoints), dom_size/(npoints-1), error_req=error_req)
+    return y, cycles
+
+
+def run_spectral(npoints):
+    y, solve_time = spectral_solve(plate('steady', npoints), dom_size/(npoints-1))
+    return y, 1
+
+
+def run_sor(npoints):
+    y, iterations, error_track, omega = sor_solve(plate('steady', npoints), diffusion_coefficients, error_req)
+    return y, iterations
+
+
+def run_parallel_sor(npoints):
+    y, iterations, error_track, omega = parallel_sor_solve(plate('steady', npoints), diffusion_coefficients, error_req)
+    return y, iterations
+
+
+def run_explicit(npoints):
+    h = dom_size/(npoints-1)
+    alpha = explicit_dt(npoints)/(h*h)
+    y, iterations, error_track = solve(plate('unsteady', npoints), lambda y, y_new: heat_update(y, y_new, alpha), error_req)
+    return y, iterations
+
+
+def run_parallel_explicit(npoints):
+    h = dom_size/(npoints-1)
+    alpha = explicit_dt(npoints)/(h*h)
+    y, iterations, error_track = parallel_solve(plate('unsteady', npoints), functools.partial(heat_update, alpha=alpha), error_req)
+    return y, iterations
+
+
+def implicit_runner(scheme, dt=0.001):
+    def run(npoints):
+        h = dom_size/(npoints-1)
+        y, iterations, error_track = solve(plate('unsteady', npoints), implicit_update(npoints, dt/(h*h), scheme), error_req)
+        return y, iterations
+    return run
+
+
+def convection_coefficients(npoints):
+    return convection_diffusion_coefficients(1, 1, 1, 1, dom_size/(npoints-1))
+
+
+def run_convection_jacobi(npoints):
+    coefficients = convection_coefficients(npoints)
+    y, iterations, error_track = solve(plate('convection', npoints), lambda T, T_new: convection_diffusion_update(T, T_new, coefficients), error_req)
+    return y, iterations
+
+
+def run_convection_sor(npoints):
+    y, iterations, error_track, omega = sor_solve(plate('convection', npoints), convection_coefficients(npoints), error_req)
+    return y, iterations
+
+
+def sparse_runner(method):
+    def run(npoints):
+        y, residual_history = sparse_solve(plate('convection', npoints), convection_coefficients(npoints), method)
+        return y, len(residual_history)
+    return run
+
+
+#every (problem, method) that can be benchmarked: the function that runs it and the largest number of points it is run at by default
+#(the point by point relaxations need O(npoints^2) iterations, so they are kept to small meshes unless --sizes asks for more)
+methods = {
+    ('steady', 'jacobi'): (run_jacobi, 129),
+    ('steady', 'sor'): (run_sor, 513),
+    ('steady', 'parallel_sor'): (run_parallel_sor, 513),
+    ('steady', 'multigrid'): (run_multigrid, 2049),
+    ('steady', 'spectral'): (run_spectral, 2049),
+    ('unsteady', 'explicit'): (run_explicit, 129),
+    ('unsteady', 'parallel_explicit'): (run_parallel_explicit, 129),
+    ('unsteady', 'backward_euler'): (implicit_runner('backward_euler'), 513),
+    ('unsteady', 'crank_nicolson'): (implicit_runner('crank_nicolson'), 513),
+    ('unsteady', 'adi'): (implicit_runner('adi'), 513),
+    ('convection', 'jacobi'): (run_convection_jacobi, 129),
+    ('convection', 'sor'): (run_convection_sor, 513),
+    ('convection', 'lu'): (sparse_runner('lu'), 513),
+    ('convection', 'bicgstab'): (sparse_runner('bicgstab'), 513),
+    ('convection', 'gmres'): (sparse_runner('gmres'), 513),
+}
+
+
+
+#empties the caches the solvers keep between calls (the sparse LU factorizations used by 'lu' and the implicit schemes)
+#so every timed run pays for the whole solve rather than reusing the work of the run before it
+def clear_caches():
+    cached_lu.cache_clear()
+
+
+#the methods whose work is done in worker processes, where tracemalloc cannot see it
+untraced_methods = ('parallel_sor', 'parallel_explicit')
+
+
+#runs a single case and returns its measurements
+#the case is run 'repeat' times and the shortest wall time is kept, which takes out most of the noise from other processes
+#the peak memory is measured on a separate run as tracing every allocation slows the solvers down (nan for untraced_methods)
+#every run starts with empty caches (see clear_caches)
+def run_case(problem, method, npoints, repeat=default_repeat):
+    run, max_points = methods[(problem, method)]
+    wall_time = float('inf')
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        y, iterations = run(npoints)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    peak = float('nan')
+    if method not in untraced_methods:
+        clear_caches()
+        tracemalloc.start()
+        try:
+            run(npoints)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result = {'problem': problem, 'method': method, 'npoints': npoints, 'iterations': int(iterations), 'wall_time': wall_time,
+              'peak_memory_mb': peak/2**20, 'checksum': float(np.sum(y)), 'l2_norm': float(np.sqrt(np.sum(y*y))), 'center': float(y[npoints//2, npoints//2])}
+    if problem == 'steady':
+        result['exact_error'] = float(np.max(np.abs(y - spectral_solve(plate('steady', npoints), dom_size/(npoints-1))[0])))
+    return result
+
+
+#runs every method of the problems given at every size up to the method's largest size (sizes given explicitly are always run)
+def run_benchmarks(problems=None, method_names=None, sizes=None, repeat=default_repeat, verbose=True):
+    results = []
+    for (problem, method), (run, max_points) in methods.items():
+        if problems is not None and problem not in problems:
+            continue
+        if method_names is not None and method not in method_names:
+            continue
+        for npoints in (sizes if sizes is not None else [n for n in default_sizes if n <= max_points]):
+            result = run_case(problem, method, npoints, repeat)
+            results.append(result)
+            if verbose:
+                print_result(result)
+    return results
+
+
+def key(result):
+    return result['problem']+"/"+result['method']+"/"+str(result['npoints'])
+
+
+def print_result(result):
+    print(key(result).ljust(34) + str(result['iterations']).rjust(10) + " iterations" + ("%.4f" % result['wall_time']).rjust(12) + " s"
+          + ("%.1f" % result['peak_memory_mb']).rjust(10) + " MB    checksum " + repr(result['checksum'])
+          + ("    exact error %.2e" % result['exact_error'] if 'exact_error' in result else ""))
+
+
+def save_baseline(results, path):
+    with open(path, "w") as file:
+        json.dump({key(result): result for result in results}, file, indent=1, sort_keys=True)
+
+
+#compares results against a stored baseline and returns a list of messages, one for every slowdown or change in the answer
+#time_tolerance is the fractional slowdown allowed (0.25 allows a run to take 25% longer), slowdowns shorter than min_slowdown seconds are ignored
+#checksum_tolerance is the relative change allowed in the checksum, the l2 norm and the centre value of the final field
+def compare(results, path, time_tolerance=0.25, checksum_tolerance=1e-8, min_slowdown=0.01):
+    with open(path) as file:
+        baseline = json.load(file)
+    flags = []
+    for result in results:
+        old = baseline.get(key(result))
+        if old is None:
+            continue
+        if result['wall_time'] > old['wall_time']*(1 + time_tolerance) and result['wall_time'] - old['wall_time'] > min_slowdown:
+            flags.append(key(result)+": slower, "+"%.4f" % result['wall_time']+" s against "+"%.4f" % old['wall_time']+" s")
+        if result['iterations'] != old['iterations']:
+            flags.append(key(result)+": "+str(result['iterations'])+" iterations against "+str(old['iterations']))
+        for name in ('checksum', 'l2_norm', 'center'):
+            if abs(result[name] - old[name]) > checksum_tolerance*max(1, abs(old[name])):
+                flags.append(key(result)+": "+name+" drifted from "+repr(old[name])+" to "+repr(result[name]))
+    return flags
+
+
+
+#the convection plate with a flow that changes over the plate, so every coefficient is an array with one value per interior point
+def field_coefficients(npoints):
+    return convection_diffusion_fields(1, 1, lambda x, y: np.sin(np.pi*y), lambda x, y: -np.sin(np.pi*x), dom_size/(npoints-1), npoints)
+
+
+#runs each parallel solver and its serial version on the same plate, including coefficient arrays (a varying flow and a stretched mesh)
+#the strips are updated with the same arithmetic as the whole plate, so the fields should be equal, the errors are only summed in a different order
+#returns a list of messages, one for every case where the iterations differ or the fields differ by more than tolerance (relative to the largest value)
+def check_parallel(npoints=34, workers=3, tolerance=1e-8):
+    h = dom_size/(npoints-1)
+    alpha = explicit_dt(npoints)/(h*h)
+    fields = field_coefficients(npoints)
+    points = stretched_points(npoints, dom_size, 2.0)
+    stretched = stretched_coefficients(points, points)
+    cases = {
+        'steady/jacobi': (lambda: solve(plate('steady', npoints), diffusion_update, error_req),
+                          lambda: parallel_solve(plate('steady', npoints), diffusion_update, error_req, workers)),
+        'unsteady/explicit': (lambda: solve(plate('unsteady', npoints), lambda y, y_new: heat_update(y, y_new, alpha), error_req),
+                              lambda: parallel_solve(plate('unsteady', npoints), functools.partial(heat_update, alpha=alpha), error_req, workers)),
+        'convection/jacobi_fields': (lambda: solve(plate('convection', npoints), lambda T, T_new: convection_diffusion_update(T, T_new, fields), error_req),
+                                     lambda: parallel_solve(plate('convection', npoints), convection_diffusion_update, error_req, workers, args=(fields,))),
+        'convection/jacobi_stretched': (lambda: solve(plate('convection', npoints), lambda T, T_new: convection_diffusion_update(T, T_new, stretched), error_req),
+                                        lambda: parallel_solve(plate('convection', npoints), convection_diffusion_update, error_req, workers, args=(stretched,))),
+        'steady/sor': (lambda: sor_solve(plate('steady', npoints), diffusion_coefficients, error_req),
+                       lambda: parallel_sor_solve(plate('steady', npoints), diffusion_coefficients, error_req, workers=workers)),
+        'convection/sor_fields': (lambda: sor_solve(plate('convection', npoints), fields, error_req),
+                                  lambda: parallel_sor_solve(plate('convection', npoints), fields, error_req, workers=workers)),
+    }
+    flags = []
+    for name, (serial, parallel) in cases.items():
+        y, iterations = serial()[:2]
+        y_parallel, iterations_parallel = parallel()[:2]
+        if iterations != iterations_parallel:
+            flags.append(name+": "+str(iterations_parallel)+" iterations in parallel against "+str(iterations)+" in serial")
+        difference = float(np.max(np.abs(y - y_parallel)))
+        if difference > tolerance*max(1.0, float(np.max(np.abs(y)))):
+            flags.append(name+": the parallel field differs from the serial one by up to "+repr(difference))
+    return flags
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="benchmarks the 2D plate solvers")
+    parser.add_argument('--problems', nargs='+', choices=sorted({problem for problem, method in methods}))
+    parser.add_argument('--methods', nargs='+', choices=sorted({method for problem, method in methods}))
+    parser.add_argument('--sizes', nargs='+', type=int)
+    parser.add_argument('--repeat', type=int, default=default_repeat, help="runs each case this many times and keeps the shortest time")
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--checksum-tolerance', type=float, default=1e-8)
+    parser.add_argument('--min-slowdown', type=float, default=0.01)
+    parser.add_argument('--check-parallel', action='store_true', help="only checks the parallel solvers against the serial ones")
+    args = parser.parse_args()
+
+    if args.check_parallel:
+        flags = check_parallel(workers=max(2, os.cpu_count() or 1))
+        for flag in flags:
+            print("FLAGGED " + flag)
+        print(str(len(flags)) + " differences between the parallel and serial solvers flagged")
+        sys.exit(1 if flags else 0)
+
+    results = run_benchmarks(args.problems, args.methods, args.sizes, args.repeat)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+    if args.compare:
+        flags = compare(results, args.baseline, args.time_tolerance, args.checksum_tolerance, args.min_slowdown)
+        for flag in flags:
+            print("FLAGGED " + flag)
+        print(str(len(flags)) + " regressions flagged")
+        sys.exit(1 if flags else 0)
@@ -0,0 +1,113 @@
+import os
+import json
+import glob
+import numpy as np
+
+#This module saves the progress of a long run to disk so it can carry on after a crash, and starts new runs from old solutions
+#a checkpoint is a single compressed .npz file holding the field, the iteration count, error_track and a small dictionary of parameters
+#(and for sor.sor_solve the over-relaxation factor omega the run had reached)
+#   Checkpointer     - a callback for plate_solver.solve / sor.sor_solve that writes a checkpoint every 'every' iterations
+#   load_checkpoint  - reads a checkpoint back, its iterations and error_track can be handed straight to solve to resume the run
+#   load_omega       - the omega stored with a checkpoint written during sor.sor_solve, to be handed back to it as start_omega
+#   warm_start       - fills the interior of a new plate with a stored solution, interpolated onto the new mesh if its size differs
+#   nearest_checkpoint - picks the stored solution whose parameters (e.g. gamma, u, v) are closest to those of a new run
+#   same_params      - checks that a checkpoint was written by a run with the same parameters before it is resumed
+#
+#a typical resume looks like:
+#   y, iterations, error_track, stored = load_checkpoint('run.npz')   (only if same_params(stored, params), otherwise use warm_start)
+#   y, iterations, error_track = solve(y, update, error_req, iterations=iterations, error_track=error_track, callback=Checkpointer('run.npz', 1000, error_track, params))
+
+
+
+#writes a checkpoint, the file only replaces an older checkpoint once it has been written completely
+#omega is only stored when it is given (nan is written in its place otherwise)
+def save_checkpoint(path, y, iterations, error_track=(), params=None, omega=None):
+    temporary = path + ".tmp.npz"
+    np.savez_compressed(temporary, y=np.asarray(y), iterations=np.int64(iterations), error_track=np.asarray(error_track, dtype=np.float64),
+                        params=np.array(json.dumps(params or {})), omega=np.float64(np.nan if omega is None else omega))
+    os.replace(temporary, path)
+
+
+#returns the field, the iteration count, error_track (as a list) and the dictionary of parameters stored in a checkpoint
+def load_checkpoint(path):
+    with np.load(path) as data:
+        return data['y'], int(data['iterations']), data['error_track'].tolist(), json.loads(str(data['params']))
+
+
+#returns the omega stored with a checkpoint, or None if it was not written by sor.sor_solve
+def load_omega(path):
+    with np.load(path) as data:
+        omega = float(data['omega']) if 'omega' in data else float('nan')
+    return None if np.isnan(omega) else omega
+
+
+
+#True if the parameters stored with a checkpoint are the same as params (compared as they are stored, so tuples and lists are equal)
+#a run should only be resumed from a checkpoint written with the same parameters, otherwise it would carry on solving a different problem
+def same_params(stored, params):
+    return stored == json.loads(json.dumps(params or {}))
+
+
+
+#a callback that saves a checkpoint every 'every' iterations
+#error_track should be the error_track the run starts from (the one from load_checkpoint when resuming) as the callback only sees the newest error
+#params is stored with the checkpoint, so nearest_checkpoint can find it later
+#omega is kept up to date by sor.sor_solve and stored with the checkpoint (it stays None for plate_solver.solve)
+class Checkpointer:
+
+    def __init__(self, path, every=1000, error_track=(), params=None, omega=None):
+        self.path = path
+        self.every = int(every)
+        self.error_track = list(error_track)
+        self.params = params
+        self.omega = omega
+
+    def __call__(self, iterations, y, error):
+        self.error_track.append(error)
+        if iterations % self.every == 0:
+            save_checkpoint(self.path, y, iterations, self.error_track, self.params, self.omega)
+
+    #saves the final state of the run (call it once the solve has finished)
+    def finish(self, y, iterations):
+        save_checkpoint(self.path, y, iterations, self.error_track, self.params, self.omega)
+
+
+
+#linear interpolation of a field on a uniform npoints by npoints mesh onto a uniform mesh with a different number of points
+#both meshes cover the same plate, e.g. a converged 34 point solution can be used as the starting guess for a 129 point run
+def interpolate_field(y, npoints):
+    old = np.linspace(0, 1, y.shape[0])
+    new = np.linspace(0, 1, npoints)
+    #interpolates along the first axis for every column, then along the second axis for every row
+    rows = np.array([np.interp(new, old, y[:,j]) for j in range(y.shape[1])]).T
+    return np.array([np.interp(new, np.linspace(0, 1, y.shape[1]), rows[i,:]) for i in range(npoints)])
+
+
+#returns a copy of the plate y (which holds the boundary conditions of the new run) with its interior taken from a stored solution
+#stored may be an array or the path of a checkpoint, it is interpolated onto the mesh of y if the sizes differ
+def warm_start(y, stored):
+    if isinstance(stored, str):
+        stored = load_checkpoint(stored)[0]
+    stored = np.asarray(stored, dtype=np.float64)
+    if stored.shape != y.shape:
+        stored = interpolate_field(stored, y.shape[0])
+    y = np.array(y, dtype=np.float64, copy=True)
+    y[1:-1,1:-1] = stored[1:-1,1:-1] #the boundary conditions of the new run are kept
+    return y
+
+
+#picks the checkpoint whose stored parameters are closest to the ones given (e.g. nearest_checkpoint('checkpoints', gamma=1.0, u=3, v=3))
+#paths may be a list of files or a folder (every .npz file in it is considered), the distance is measured relative to the size of each parameter
+#returns None if no checkpoint has all of the parameters asked for
+def nearest_checkpoint(paths, **params):
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(os.path.join(paths, "*.npz")))
+    best, best_distance = None, float('inf')
+    for path in paths:
+        stored = load_checkpoint(path)[3]
+        if not all(key in stored for key in params):
+            continue
+        distance = sum(((stored[key] - value)/max(abs(value), 1e-12))**2 for key, value in params.items())
+        if distance < best_distance:
+            best, best_distance = path, distance
+    return best
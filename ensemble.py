@@ -0,0 +1,109 @@
+import numpy as np
+from plate_solver import convection_diffusion_coefficients
+
+#This module solves many plates at once, e.g. the same plate with different boundary temperatures, gamma, u and v
+#the B plates are stacked into one array of shape (B, npoints, npoints) and every update of plate_solver acts on the whole stack in one go
+#(the updates index the last two axes, and a coefficient with one value per plate has the shape (B, 1, 1) so it broadcasts over each plate)
+#each plate has its own error and stops as soon as its own error is less than error_req, exactly as it would with plate_solver.solve:
+#the plates that have finished are taken out of the stack, so they stop changing and the rest of the run does no work on them
+#the stack is updated a few plates at a time (chunk plates), small enough for the arrays being worked on to stay in the CPU cache,
+#so a large ensemble saves the Python overhead of running each plate on its own without losing speed to memory traffic
+#
+#   T = make_ensemble(34, bottom=[1, 1, 0.5], left=1)
+#   coefficients = ensemble_coefficients(gamma=[1, 0.5, 0.1], rho=1, u=[0, 1, 2], v=[0, 1, 2], h=1/33)
+#   T, iterations, error_tracks = ensemble_solve(T, convection_diffusion_update, (coefficients,))
+
+chunk_bytes = 2**16 #the size of the part of each array updated at once (about the size of a level 2 cache shared between a few arrays)
+
+
+#one value per plate of a scalar or a list of length B, shaped (B, 1, 1) so it broadcasts over the points of each plate
+def per_plate(value, B):
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (B,)).reshape(B, 1, 1)
+
+
+#the number of plates described by a set of per plate values (1 when all of them are scalars)
+def ensemble_size(*values):
+    return max([np.size(value) for value in values] + [1])
+
+
+#sets up a stack of plates with their boundary conditions, in the same way as plate_solver.make_plate
+#each boundary temperature may be a scalar (the same for every plate) or a list with one value per plate
+def make_ensemble(npoints, bottom=0.0, left=0.0, right=0.0, top=0.0, B=None, dtype=np.float64):
+    B = B or ensemble_size(bottom, left, right, top)
+    y = np.zeros((B,npoints,npoints), dtype=dtype) #the interior points start at zero
+    y[:,:,-1] = per_plate(right, B)[:,:,0] #sets the boundary condition of the rightmost column
+    y[:,-1,:] = per_plate(top, B)[:,:,0] #sets the boundary condition of the top row
+    y[:,0,:] = per_plate(bottom, B)[:,:,0] #sets the boundary condition of the bottom row
+    y[:,:,0] = per_plate(left, B)[:,:,0] #sets the boundary condition of the leftmost column
+    return y
+
+
+#the coefficients of plate_solver.convection_diffusion_coefficients with one value per plate
+#gamma, rho, u and v may each be a scalar or a list with one value per plate, scheme is one of plate_solver.differencing
+def ensemble_coefficients(gamma, rho, u, v, h, B=None, scheme='central'):
+    B = B or ensemble_size(gamma, rho, u, v)
+    return convection_diffusion_coefficients(per_plate(gamma, B), per_plate(rho, B), per_plate(u, B), per_plate(v, B), h, scheme)
+
+
+#the error of every plate in the stack (the sum of the absolute difference between the old and new values of its interior points)
+def ensemble_residual(y, y_new):
+    return np.abs(y[:,1:-1,1:-1] - y_new[:,1:-1,1:-1]).sum(axis=(1,2))
+
+
+#keeps only the plates picked out by 'keep' (a slice or a boolean mask) from an argument of the update
+#an argument can be a scalar (shared by every plate), an array with one entry per plate along its first axis, or a tuple of these
+def select(argument, keep):
+    if isinstance(argument, tuple):
+        return tuple(select(a, keep) for a in argument)
+    return argument if np.ndim(argument) == 0 else argument[keep]
+
+
+
+#keeps applying 'update' to a stack of plates until the error of every plate is less than error_req
+#update is called as update(y, y_new, *args) on the plates still running (e.g. plate_solver.convection_diffusion_update with
+#args = (coefficients,), or plate_solver.heat_update with args = (alpha,) where alpha may have one value per plate)
+#every argument in args is cut down along with the stack when plates finish, see select
+#chunk is the number of plates updated at once (worked out from chunk_bytes when None)
+#returns the stack of converged fields, the number of iterations of each plate and a list with the error_track of each plate
+def ensemble_solve(y, update, args=(), error_req=1e-6, max_iterations=None, chunk=None):
+    result = np.array(y, dtype=np.float64, copy=True) #the caller's array is left untouched
+    B = result.shape[0]
+    chunk = chunk or max(1, chunk_bytes//(result[0].size*result.itemsize))
+    iterations = np.zeros(B, dtype=int)
+    error_tracks = [[] for b in range(B)]
+
+    running = np.arange(B) #the plates still being solved, in the order they sit in the working stack
+    y = result.copy()
+    y_new = y.copy() #the second buffer starts with the same boundary conditions as y
+    count = 0
+    parts = [slice(start, start + chunk) for start in range(0, B, chunk)]
+    part_args = [select(args, part) for part in parts] #the arguments of each chunk are only cut out again when plates finish
+    while len(running) > 0:
+        if max_iterations is not None and count >= max_iterations:
+            break
+
+        errors = np.empty(len(running))
+        for part, arguments in zip(parts, part_args):
+            update(y[part], y_new[part], *arguments)
+            errors[part] = ensemble_residual(y[part], y_new[part])
+        count = count + 1
+        for b, error in zip(running, errors.tolist()):
+            error_tracks[b].append(error)
+
+        y, y_new = y_new, y #y now holds the newest values and the old array is reused on the next iteration
+
+        finished = errors <= error_req
+        if np.any(finished):
+            result[running[finished]] = y[finished]
+            iterations[running[finished]] = count
+            keep = ~finished #the finished plates are taken out, so only the plates still running are updated from now on
+            running = running[keep]
+            y = y[keep]
+            y_new = y_new[keep]
+            args = select(args, keep)
+            parts = [slice(start, start + chunk) for start in range(0, len(running), chunk)]
+            part_args = [select(args, part) for part in parts]
+
+    result[running] = y #the plates stopped by max_iterations
+    iterations[running] = count
+    return result, iterations, error_tracks
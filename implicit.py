@@ -0,0 +1,77 @@
+import numpy as np
+from sparse_solver import assemble_rhs, lu_factorize
+
+#This module holds implicit time steps for the unsteady heat diffusion equation of '2D unsteady heat diffusion.py'
+#the explicit update in plate_solver.heat_update is only stable while alpha = (Gamma Delta t/ h^2) is at most 1/4
+#so halving h forces Delta t to shrink four times, the schemes here are stable for any Delta t:
+#   'backward_euler'  - fully implicit, first order accurate in time and the most strongly damped
+#   'crank_nicolson'  - the average of the explicit and the fully implicit step, second order accurate in time
+#   'adi'             - Crank-Nicolson split into two half steps that are each implicit along one axis only (Peaceman-Rachford)
+#                       every half step is a batch of tridiagonal systems (one per row or column) solved together with the Thomas algorithm
+#note: for very large alpha Crank-Nicolson and ADI let the finest wiggles of the field decay slowly while changing sign every step, backward Euler does not
+#the boundary values are taken from the arrays themselves and are held fixed, just like in the explicit update
+
+schemes = ('backward_euler', 'crank_nicolson', 'adi')
+
+
+
+#the five point Laplacian (without the 1/h^2) of the points interior to the domain
+def laplacian(y):
+    return y[:-2,1:-1] + y[2:,1:-1] + y[1:-1,:-2] + y[1:-1,2:] - 4*y[1:-1,1:-1]
+
+
+#solves a batch of tridiagonal systems with constant coefficients (lower, diag, upper) along the first axis of rhs
+#every column of rhs is a separate system, they are all solved together with whole-array operations (the Thomas algorithm)
+def thomas(lower, diag, upper, rhs):
+    m = rhs.shape[0]
+    c = np.empty(m) #the modified upper coefficients, they are the same for every system in the batch
+    d = np.empty_like(rhs)
+    c[0] = upper/diag
+    d[0] = rhs[0]/diag
+    for i in range(1, m):
+        denom = diag - lower*c[i-1]
+        c[i] = upper/denom
+        d[i] = (rhs[i] - lower*d[i-1])/denom
+    for i in range(m-2, -1, -1): #back substitution
+        d[i] = d[i] - c[i]*d[i+1]
+    return d
+
+
+
+#makes the update function of an implicit scheme for a plate with npoints along each edge and alpha = (Gamma Delta t/ h^2)
+#the update is called as update(y, y_new) just like plate_solver.heat_update, so it can be handed straight to plate_solver.solve
+#the sparse LU factorization used by 'backward_euler' and 'crank_nicolson' is worked out once and reused on every step
+def implicit_update(npoints, alpha, scheme='crank_nicolson'):
+    if scheme not in schemes:
+        raise ValueError("scheme must be one of "+", ".join(schemes)+", not "+repr(scheme))
+
+    if scheme == 'adi':
+        a = alpha/2
+        def update(y, y_new):
+            y_new[1:-1,1:-1] = y[1:-1,1:-1] #y_new first holds the half step, its boundary values are the fixed ones
+
+            #first half step: implicit along the x-axis (the first index), explicit along the y-axis
+            rhs = y[1:-1,1:-1] + a*(y[1:-1,:-2] - 2*y[1:-1,1:-1] + y[1:-1,2:])
+            rhs[0,:] += a*y[0,1:-1] #the boundary values next to the first and last rows of unknowns
+            rhs[-1,:] += a*y[-1,1:-1]
+            y_new[1:-1,1:-1] = thomas(-a, 1 + 2*a, -a, rhs)
+
+            #second half step: implicit along the y-axis (the second index), explicit along the x-axis
+            rhs = y_new[1:-1,1:-1] + a*(y_new[:-2,1:-1] - 2*y_new[1:-1,1:-1] + y_new[2:,1:-1])
+            rhs[:,0] += a*y_new[1:-1,0]
+            rhs[:,-1] += a*y_new[1:-1,-1]
+            y_new[1:-1,1:-1] = thomas(-a, 1 + 2*a, -a, rhs.T).T
+        return update
+
+    #the fraction of the step taken implicitly: 1 for backward Euler and 1/2 for Crank-Nicolson
+    theta = 1.0 if scheme == 'backward_euler' else 0.5
+    #(1 + 4*theta*alpha)*y_P - theta*alpha*(y_E + y_W + y_N + y_S) = right hand side, which is the five point system of sparse_solver
+    coefficients = (theta*alpha, theta*alpha, theta*alpha, theta*alpha, 1 + 4*theta*alpha)
+    factor = lu_factorize(npoints, coefficients)
+    m = npoints - 2
+
+    def update(y, y_new):
+        rhs = y[1:-1,1:-1] + (1 - theta)*alpha*laplacian(y) #the explicit part of the step (nothing for backward Euler)
+        rhs = rhs.ravel() + assemble_rhs(y, coefficients)[:,0] #the fixed boundary values at the new time level
+        y_new[1:-1,1:-1] = factor.solve(rhs).reshape(m,m)
+    return update
@@ -0,0 +1,107 @@
+import sys
+import json
+import time
+import numpy as np
+
+try:
+    import resource #not available on Windows, the memory high-water mark is then reported as nan
+except ImportError:
+    resource = None
+
+#This module measures how plate_solver.solve is performing while it runs, without editing the scripts
+#a Monitor is handed to solve (solve(..., monitor=Monitor(every=100))) and every 'every' iterations it records one row of metrics:
+#   iteration              - the number of iterations completed
+#   elapsed                - wall time since the solve started (s)
+#   update_time            - average wall time per iteration spent applying the governing equation (s)
+#   residual_time          - average wall time per iteration spent working out the error (s)
+#   swap_time              - average wall time per iteration spent swapping the two arrays (s)
+#   cell_updates_per_second - points interior to the domain updated per second since the previous row
+#   max_rss_mb             - the largest amount of memory the process has used so far (MB)
+#   error                  - the error used by the scripts (the sum of the absolute change of every interior point)
+#   l2                     - the root mean square change of the interior points
+#   linf                   - the largest change of any interior point
+#the rows are kept in a preallocated array (it doubles in size if it fills up) and can be exported with to_csv or to_json
+#callbacks are called as callback(row) with the row as a dictionary every time one is recorded
+
+fields = ('iteration', 'elapsed', 'update_time', 'residual_time', 'swap_time', 'cell_updates_per_second', 'max_rss_mb', 'error', 'l2', 'linf')
+
+
+
+#the largest amount of memory the process has used so far in MB
+def max_rss_mb():
+    if resource is None:
+        return float('nan')
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss/2**20 if sys.platform == 'darwin' else rss/2**10 #bytes on macOS, kilobytes on Linux
+
+
+#prints the iterations and the error, like the scripts did every 1000 iterations
+def print_progress(row):
+    print(int(row['iteration'])) # print the number of iterations
+    print(row['error']) # print the value of the error
+
+
+
+class Monitor:
+
+    def __init__(self, every=1, callbacks=(), capacity=1024):
+        self.every = int(every)
+        self.callbacks = list(callbacks)
+        self.data = np.full((capacity, len(fields)), np.nan)
+        self.count = 0
+
+
+    #called by solve before the first iteration (iterations is not zero when a run carries on from a checkpoint)
+    def start(self, y, iterations=0):
+        self.cells = (y.shape[-2] - 2)*(y.shape[-1] - 2)*int(np.prod(y.shape[:-2]))
+        self.count = 0
+        self.started = time.perf_counter()
+        self.last_time = self.started
+        self.last_iteration = iterations
+        self.phase_times = np.zeros(3) #update, residual and swap time summed since the previous row
+
+
+    #called by solve after every iteration with the time spent in each phase
+    def add(self, update_time, residual_time, swap_time):
+        self.phase_times += (update_time, residual_time, swap_time)
+
+
+    #called by solve with the old and new values every 'every' iterations (and after the last iteration)
+    def record(self, iterations, y_old, y, error):
+        if iterations == self.last_iteration:
+            return
+        now = time.perf_counter()
+        steps = iterations - self.last_iteration
+        change = np.abs(y[...,1:-1,1:-1] - y_old[...,1:-1,1:-1])
+
+        if self.count == len(self.data):
+            self.data = np.concatenate([self.data, np.full_like(self.data, np.nan)]) #doubles the space for rows
+        row = self.data[self.count]
+        row[:] = (iterations, now - self.started, *(self.phase_times/steps), self.cells*steps/max(now - self.last_time, 1e-12),
+                  max_rss_mb(), error, np.sqrt(np.mean(change**2)), np.max(change))
+        self.count = self.count + 1
+
+        self.last_time = now
+        self.last_iteration = iterations
+        self.phase_times[:] = 0
+        for callback in self.callbacks:
+            callback(dict(zip(fields, row.tolist())))
+
+
+    #the rows recorded so far, one column per entry of fields
+    @property
+    def metrics(self):
+        return self.data[:self.count]
+
+
+    def column(self, name):
+        return self.metrics[:, fields.index(name)]
+
+
+    def to_csv(self, path):
+        np.savetxt(path, self.metrics, fmt='%.10g', delimiter=',', header=','.join(fields), comments='')
+
+
+    def to_json(self, path):
+        with open(path, "w") as file:
+            json.dump([dict(zip(fields, row)) for row in self.metrics.tolist()], file, indent=1)
@@ -0,0 +1,125 @@
+import time
+import warnings
+import numpy as np
+from spectral import spectral_solve
+
+#This module solves the steady state heat diffusion problem of '2D steady state diffusion.py' with geometric multigrid
+#the equation being solved is -(d^2y/dx^2 + d^2y/dy^2) = f on the points interior to the domain, with the boundary values of y held fixed (Dirichlet)
+#for the plate in the script f is zero everywhere (the Laplace equation)
+#the grid hierarchy is built by repeatedly dropping every second point, so the number of points should be 2^k + 1 (e.g. 33, 129, 4097)
+#other sizes still work but coarsening stops as soon as (npoints-1) is odd, so the coarsest grid is larger
+#the coarsest grid is always solved exactly (with spectral.spectral_solve), so the answer is right at any size, only the cost per cycle goes up
+
+
+
+#one red-black Gauss-Seidel sweep
+#the points interior to the domain are split like a chess board so every 'red' point only has 'black' neighbours and vice versa
+#this lets each colour be updated with whole-array slicing while still using the newest values (unlike Jacobi)
+def smooth(y, f, h, sweeps=1):
+    n = y.shape[0]
+    h2 = h*h
+    for _ in range(sweeps):
+        for si, sj in ((1,1),(2,2),(1,2),(2,1)): #the first two offsets are the red points and the last two are the black points
+            y[si:n-1:2, sj:n-1:2] = 0.25*(y[si-1:n-2:2, sj:n-1:2] + y[si+1:n:2, sj:n-1:2] + y[si:n-1:2, sj-1:n-2:2] + y[si:n-1:2, sj+1:n:2] + h2*f[si:n-1:2, sj:n-1:2])
+
+
+#the residual f + (d^2y/dx^2 + d^2y/dy^2) at the points interior to the domain (zero on the boundary)
+def residual(y, f, h):
+    r = np.zeros_like(y)
+    r[1:-1,1:-1] = f[1:-1,1:-1] + (y[:-2,1:-1] + y[2:,1:-1] + y[1:-1,:-2] + y[1:-1,2:] - 4*y[1:-1,1:-1])/(h*h)
+    return r
+
+
+#the sum of the absolute change one Jacobi sweep would make to the points interior to the domain
+#this is what is compared against error_req, so error_req means the same as for plate_solver.solve and sor.sor_solve
+def residual_norm(y, f, h):
+    return float(np.sum(np.abs(residual(y, f, h))))*h*h/4
+
+
+#full weighting restriction of a fine grid array onto the next coarser grid (boundary values are set to zero)
+def restrict(r):
+    n = r.shape[0]
+    nc = (n - 1)//2 + 1
+    rc = np.zeros((nc,nc), dtype=r.dtype)
+    rc[1:-1,1:-1] = (4*r[2:n-2:2, 2:n-2:2]
+                     + 2*(r[1:n-3:2, 2:n-2:2] + r[3:n-1:2, 2:n-2:2] + r[2:n-2:2, 1:n-3:2] + r[2:n-2:2, 3:n-1:2])
+                     + r[1:n-3:2, 1:n-3:2] + r[3:n-1:2, 1:n-3:2] + r[1:n-3:2, 3:n-1:2] + r[3:n-1:2, 3:n-1:2])/16
+    return rc
+
+
+#bilinear interpolation of a coarse grid array onto the next finer grid
+def prolong(yc):
+    nc = yc.shape[0]
+    n = 2*(nc - 1) + 1
+    y = np.zeros((n,n), dtype=yc.dtype)
+    y[::2,::2] = yc #points shared by both grids
+    y[1::2,::2] = 0.5*(yc[:-1,:] + yc[1:,:]) #points halfway between two coarse points along the x-axis
+    y[::2,1::2] = 0.5*(yc[:,:-1] + yc[:,1:]) #points halfway between two coarse points along the y-axis
+    y[1::2,1::2] = 0.25*(yc[:-1,:-1] + yc[1:,:-1] + yc[:-1,1:] + yc[1:,1:]) #points in the middle of a coarse cell
+    return y
+
+
+#the coarsest grid can be coarsened again if it has an even number of cells and more than one interior point
+def can_coarsen(n):
+    return n > 3 and (n - 1) % 2 == 0
+
+
+#solves the equation on the coarsest grid exactly, whatever its size
+def coarse_solve(y, f, h):
+    y[...] = spectral_solve(y, h, f)[0]
+
+
+#one V-cycle: smooth, move the residual to the coarser grid, solve for the correction there, bring it back and smooth again
+def v_cycle(y, f, h, pre_smooth=2, post_smooth=2):
+    n = y.shape[0]
+    if not can_coarsen(n):
+        coarse_solve(y, f, h)
+        return
+
+    smooth(y, f, h, pre_smooth)
+    rc = restrict(residual(y, f, h))
+    ec = np.zeros_like(rc) #the correction is zero on the boundary as the boundary values are already correct
+    v_cycle(ec, rc, 2*h, pre_smooth, post_smooth)
+    y[1:-1,1:-1] += prolong(ec)[1:-1,1:-1]
+    smooth(y, f, h, post_smooth)
+
+
+#full multigrid: solve on the coarsest grid first and interpolate each solution up as the starting guess of the next finer grid
+#this gives a starting field that is already close to the answer at every level
+def fmg_start(y, f, h, pre_smooth=2, post_smooth=2):
+    n = y.shape[0]
+    if not can_coarsen(n):
+        coarse_solve(y, f, h)
+        return
+
+    yc = y[::2,::2].copy() #the coarse grid takes its boundary values from the points shared with the fine grid
+    fc = restrict(f)
+    fmg_start(yc, fc, 2*h, pre_smooth, post_smooth)
+    y[1:-1,1:-1] = prolong(yc)[1:-1,1:-1]
+    v_cycle(y, f, h, pre_smooth, post_smooth)
+
+
+
+#solves the steady state heat diffusion problem for the boundary values held in y
+#f is an optional source term (zero if not given) and h is the length of the edge of each cell in the mesh
+#cycles of V-cycles are carried out until residual_norm is less than error_req (a RuntimeWarning is given if max_cycles runs out first)
+#when fmg is True the V-cycles start from the full multigrid guess instead of from y
+#returns the solution, the number of cycles, the residual after each cycle (the first entry is the starting residual) and the time taken in seconds
+def multigrid_solve(y, h, f=None, error_req=1e-6, max_cycles=50, pre_smooth=2, post_smooth=2, fmg=True):
+    start = time.perf_counter()
+    y = np.array(y, dtype=np.float64, copy=True)
+    f = np.zeros_like(y) if f is None else np.asarray(f, dtype=np.float64)
+
+    if fmg:
+        fmg_start(y, f, h, pre_smooth, post_smooth)
+
+    residual_history = [residual_norm(y, f, h)]
+    cycles = 0
+    while residual_history[-1] > error_req and cycles < max_cycles:
+        v_cycle(y, f, h, pre_smooth, post_smooth)
+        cycles = cycles + 1
+        residual_history.append(residual_norm(y, f, h))
+
+    if residual_history[-1] > error_req:
+        warnings.warn("multigrid_solve stopped after "+str(cycles)+" cycles with a residual of "+str(residual_history[-1])+", above error_req", RuntimeWarning)
+    return y, cycles, residual_history, time.perf_counter() - start
@@ -0,0 +1,191 @@
+import os
+import queue as queues
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from plate_solver import residual
+from sor import sor_colour, initial_omega, adapt_omega, diffusion_coefficients
+
+#This module runs the plate solvers on several cores at once
+#the rows of the points interior to the domain are split into strips and every strip is owned by one worker process
+#the plate itself lives in shared memory (multiprocessing.shared_memory), so every worker works directly on the same arrays
+#a worker only writes to its own rows, the one row of halo on each side of its strip is read straight from its neighbours' rows
+#a barrier after every update makes sure those halo rows are complete before anyone reads them (this is the halo exchange)
+#each worker also writes the error of its own strip to a shared array, and every worker adds them up in the same order,
+#so they all reach the same decision about error_req and stop on the same iteration
+#
+#parallel_solve    - any two buffer update from plate_solver (the steady Jacobi updates and the explicit unsteady update)
+#                    the update's extra arguments (e.g. the coefficients of convection_diffusion_update) are passed in args
+#parallel_sor_solve - the in place red-black SOR of sor.py, with a barrier between the red and the black points
+#
+#the update must be picklable (a function defined at the top of a module, or a functools.partial of one)
+#the workers are started with 'fork' where it is available so the scripts (which have no if __name__ == '__main__': guard) are not run again in every worker
+#coefficient arrays (one value per interior point, e.g. from plate_solver.convection_diffusion_fields or stretched.py) are split into strips
+#along with the plate, so they have to be handed over as coefficients (parallel_sor_solve) or in args (parallel_solve),
+#not baked into the update with functools.partial, where a worker would get the arrays of the whole plate
+
+
+
+def context():
+    return multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+#the first row of each strip (the last entry is one past the last interior row)
+#every strip gets at least two rows, thinner strips would spend more time waiting at the barrier than working
+def strip_rows(npoints, workers):
+    workers = max(1, min(workers, (npoints - 2)//2))
+    return np.linspace(1, npoints - 1, workers + 1).round().astype(int).tolist()
+
+
+#the part of the coefficients (scalars, or arrays with one value per interior point) that belongs to the strip of rows r0 to r1-1
+#coefficients may be a single coefficient or a tuple of them (tuples inside tuples are split as well)
+def strip_coefficients(coefficients, r0, r1):
+    if isinstance(coefficients, tuple):
+        return tuple(strip_coefficients(a, r0, r1) for a in coefficients)
+    return coefficients if np.ndim(coefficients) == 0 else np.asarray(coefficients)[r0-1:r1-1]
+
+
+#makes the shared arrays and returns them with the shared memory blocks that hold them
+def shared_arrays(shapes):
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))*8)) for shape in shapes]
+    arrays = [np.ndarray(shape, dtype=np.float64, buffer=block.buf) for shape, block in zip(shapes, blocks)]
+    return blocks, arrays
+
+
+def attach(names, shapes):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    arrays = [np.ndarray(shape, dtype=np.float64, buffer=block.buf) for shape, block in zip(shapes, blocks)]
+    return blocks, arrays
+
+
+
+#the work done by each process of parallel_solve
+def jacobi_worker(w, names, shapes, rows, update, args, error_req, max_iterations, barrier, queue):
+    blocks, (y0, y1, partials) = attach(names, shapes)
+    buffers = (y0, y1)
+    r0, r1 = rows[w], rows[w+1]
+    args = strip_coefficients(tuple(args), r0, r1)
+    try:
+        error = error_req + 1
+        error_track = []
+        iterations = 0
+        while error > error_req and (max_iterations is None or iterations < max_iterations):
+            y, y_new = buffers[iterations % 2], buffers[(iterations + 1) % 2] #the two buffers swap roles every iteration
+            update(y[r0-1:r1+1], y_new[r0-1:r1+1], *args) #this strip plus one halo row on each side
+            partials[iterations % 2, w] = residual(y[r0-1:r1+1], y_new[r0-1:r1+1])
+            barrier.wait() #every strip is updated, so the halo rows are ready for the next iteration
+            error = float(np.sum(partials[iterations % 2])) #the partial errors are kept for two iterations so nobody overwrites one still being read
+            iterations = iterations + 1
+            error_track.append(error)
+        if w == 0:
+            queue.put((iterations, error_track))
+    except BaseException:
+        barrier.abort() #the other workers stop waiting instead of hanging
+        raise
+    finally:
+        del y0, y1, partials, buffers
+        for block in blocks:
+            block.close()
+
+
+#the work done by each process of parallel_sor_solve
+def sor_worker(w, names, shapes, rows, coefficients, omega, adaptive, window, settle, error_req, max_iterations, barrier, queue):
+    blocks, (y, partials) = attach(names, shapes)
+    r0, r1 = rows[w], rows[w+1]
+    strip = y[r0-1:r1+1]
+    coefficients = strip_coefficients(coefficients, r0, r1)
+    try:
+        error = error_req + 1
+        error_track = []
+        iterations = 0
+        while error > error_req and (max_iterations is None or iterations < max_iterations):
+            change = sor_colour(strip, coefficients, omega, 0, r0 - 1)
+            barrier.wait() #the red points are finished before any black point reads them
+            change = change + sor_colour(strip, coefficients, omega, 1, r0 - 1)
+            partials[iterations % 2, w] = change
+            barrier.wait() #the black points are finished before the next red points read them
+            error = float(np.sum(partials[iterations % 2]))
+            iterations = iterations + 1
+            error_track.append(error)
+            if adaptive: #every worker sees the same error_track, so they all pick the same omega
+                omega = adapt_omega(error_track, omega, window, settle)
+        if w == 0:
+            queue.put((iterations, error_track, omega))
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        del y, partials, strip
+        for block in blocks:
+            block.close()
+
+
+#starts one process per strip, waits for them to finish and returns what worker 0 reported
+def run_workers(target, workers, args):
+    ctx = context()
+    barrier = ctx.Barrier(workers)
+    queue = ctx.Queue()
+    processes = [ctx.Process(target=target, args=(w,) + args + (barrier, queue)) for w in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        report = None
+        while report is None:
+            try:
+                report = queue.get(timeout=0.1)
+            except queues.Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError("a worker process failed")
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+    return report
+
+
+
+#the parallel version of plate_solver.solve
+#update is called on each strip (with its halo rows) as update(y, y_new, *args), e.g. plate_solver.diffusion_update,
+#functools.partial(plate_solver.heat_update, alpha=alpha) or plate_solver.convection_diffusion_update with args = (coefficients,)
+#every array in args (or in a tuple in args) holds one value per interior point and each worker is given the rows of its own strip
+#workers is the number of processes (all cores when None)
+#returns the converged field, the number of iterations and the list tracking how the error changed with each iteration
+def parallel_solve(y, update, error_req=1e-6, workers=None, max_iterations=None, args=()):
+    y = np.asarray(y, dtype=np.float64)
+    rows = strip_rows(y.shape[0], workers or os.cpu_count() or 1)
+    shapes = [y.shape, y.shape, (2, len(rows) - 1)]
+    blocks, (y0, y1, partials) = shared_arrays(shapes)
+    try:
+        y0[...] = y
+        y1[...] = y #both buffers hold the boundary conditions
+        iterations, error_track = run_workers(jacobi_worker, len(rows) - 1, ([block.name for block in blocks], shapes, rows, update, args, error_req, max_iterations))
+        result = np.array((y0, y1)[iterations % 2]) #the buffer written last
+    finally:
+        del y0, y1, partials
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return result, iterations, error_track
+
+
+#the parallel version of sor.sor_solve, with the same choices of omega ('grid', 'adaptive' or a number)
+#returns the converged field, the number of sweeps, the list tracking how the error changed with each sweep and the omega used
+def parallel_sor_solve(y, coefficients=diffusion_coefficients, error_req=1e-6, omega='grid', workers=None, max_iterations=None, window=20, settle=1e-3):
+    y = np.asarray(y, dtype=np.float64)
+    omega, adaptive = initial_omega(y.shape[0], coefficients, omega)
+    rows = strip_rows(y.shape[0], workers or os.cpu_count() or 1)
+    shapes = [y.shape, (2, len(rows) - 1)]
+    blocks, (shared, partials) = shared_arrays(shapes)
+    try:
+        shared[...] = y
+        iterations, error_track, omega = run_workers(sor_worker, len(rows) - 1, ([block.name for block in blocks], shapes, rows, coefficients, omega, adaptive, window, settle, error_req, max_iterations))
+        result = np.array(shared)
+    finally:
+        del shared, partials
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return result, iterations, error_track, omega
@@ -0,0 +1,162 @@
+import time
+import numpy as np
+
+#This module holds the pieces shared by the three 2D plate scripts
+#every update acts on whole slices of the array at once instead of looping over each point with a pair of 'for loops'
+#the convention used throughout is the same as in the scripts: the first index runs along the x-axis and the second index along the y-axis
+#so y[0,:] is the bottom row, y[-1,:] is the top row, y[:,0] is the leftmost column and y[:,-1] is the rightmost column
+#the updates index the last two axes, so they also work on a stack of plates of shape (B, npoints, npoints) (see ensemble.py)
+#with each coefficient either a scalar or an array of shape (B, 1, 1) holding one value per plate
+
+
+
+#sets up the plate (i.e. domain) with its boundary conditions
+#the right and top edges are applied first and the bottom and left edges last, which is the order the scripts use
+#this means the corners shared with the bottom row or the leftmost column take the bottom/left temperature
+def make_plate(npoints, bottom=0.0, left=0.0, right=0.0, top=0.0, dtype=np.float64):
+    y = np.zeros((npoints,npoints), dtype=dtype) #the interior points start at zero
+    y[:,-1] = right #sets the boundary condition of the rightmost column
+    y[-1,:] = top #sets the boundary condition of the top row
+    y[0,:] = bottom #sets the boundary condition of the bottom row
+    y[:,0] = left #sets the boundary condition of the leftmost column
+    return y
+
+
+
+#the governing equation for steady state heat diffusion (the Laplace equation) solved with a Jacobi update
+#each interior point of y_new becomes the average of its four neighbours in y
+def diffusion_update(y, y_new):
+    y_new[...,1:-1,1:-1] = 0.25*(y[...,:-2,1:-1] + y[...,2:,1:-1] + y[...,1:-1,:-2] + y[...,1:-1,2:])
+
+
+#the governing equation for unsteady heat diffusion using an explicit (forward Euler) time step
+#alpha is the term (Gamma Delta t/ h^2)
+def heat_update(y, y_new, alpha):
+    y_new[...,1:-1,1:-1] = y[...,1:-1,1:-1] + alpha*(y[...,:-2,1:-1] + y[...,2:,1:-1] + y[...,1:-1,:-2] + y[...,1:-1,2:] - (4*y[...,1:-1,1:-1]))
+
+
+#the function A(|P|) of each differencing scheme for the convection diffusion equation (Patankar, Numerical Heat Transfer and Fluid Flow, table 5.2)
+#P is the cell Peclet number across a face, A(|P|) scales the diffusion part of the neighbour's coefficient on that side
+#central differencing gives negative coefficients (and oscillating or diverging solutions) once |P| passes 2,
+#upwind is stable for any P but smears the solution, hybrid is central below |P| = 2 and upwind above it, and power_law follows the exact 1D solution closely
+differencing = {
+    'central': lambda P: 1 - 0.5*P,
+    'upwind': lambda P: np.ones_like(P),
+    'hybrid': lambda P: np.maximum(0, 1 - 0.5*P),
+    'power_law': lambda P: np.maximum(0, 1 - 0.1*P)**5,
+}
+
+
+#the coefficients of the scheme given the diffusion D = gamma and the convection F = rho*u*h (or rho*v*h) through each face of a cell
+def face_coefficients(D_e, D_w, D_n, D_s, F_e, F_w, F_n, F_s, scheme):
+    if scheme not in differencing:
+        raise ValueError("unknown differencing scheme "+repr(scheme)+", expected one of "+", ".join(differencing))
+    A = differencing[scheme]
+    a_E = D_e*A(np.abs(F_e/D_e)) + np.maximum(-F_e, 0)
+    a_W = D_w*A(np.abs(F_w/D_w)) + np.maximum(F_w, 0)
+    a_N = D_n*A(np.abs(F_n/D_n)) + np.maximum(-F_n, 0)
+    a_S = D_s*A(np.abs(F_s/D_s)) + np.maximum(F_s, 0)
+    a_P = a_E + a_W + a_N + a_S + (F_e - F_w) + (F_n - F_s) #the last two terms are zero when the flow satisfies continuity
+    return a_E, a_W, a_N, a_S, a_P
+
+
+#the coefficients of the steady convection diffusion equation when gamma, rho, u and v are the same over the whole plate
+#they are the same for every cell so they only need to be worked out once
+#scheme is 'central' (the scheme of the script), 'upwind', 'hybrid' or 'power_law' (see differencing)
+#gamma, rho, u and v may also be arrays of shape (B, 1, 1) holding one value per plate of a stack (see ensemble.py)
+def convection_diffusion_coefficients(gamma, rho, u, v, h, scheme='central'):
+    if scheme != 'central':
+        F_x = rho*u*h
+        F_y = rho*v*h
+        return face_coefficients(gamma, gamma, gamma, gamma, F_x, F_x, F_y, F_y, scheme)
+    a_E = gamma - (rho*u*h)/2
+    a_W = gamma + (rho*u*h)/2
+    a_N = gamma - (rho*v*h)/2
+    a_S = gamma + (rho*v*h)/2
+    a_P = (rho*u*h)/2 - (rho*u*h)/2 + (rho*v*h)/2 - (rho*v*h)/2 + gamma + gamma + gamma + gamma
+    return a_E, a_W, a_N, a_S, a_P
+
+
+#the values of f(x, y) at every point of a plate with n_points along each edge and spacing h, as an (n_points, n_points) array
+#f may also be a number (the same everywhere) or an array that already holds one value per point
+def mesh_field(f, n_points, h):
+    if callable(f):
+        x = np.arange(n_points)*h #the first index runs along the x-axis and the second along the y-axis
+        f = f(x[:,None], x[None,:])
+    return np.array(np.broadcast_to(np.asarray(f, dtype=np.float64), (n_points,n_points)))
+
+
+#the coefficients of the steady convection diffusion equation when gamma, rho, u and v change over the plate
+#each of them may be a number, an (n_points, n_points) array of values at the points of the mesh or a function f(x, y) (see mesh_field)
+#the values on the face between two points are the average of the two (the harmonic average for gamma, so a jump in gamma is handled properly)
+#the result holds one (n_points-2, n_points-2) array per coefficient, worked out once and then used on every iteration
+#they can be handed to convection_diffusion_update, sor.sor_solve and sparse_solver.sparse_solve like the constant coefficients
+def convection_diffusion_fields(gamma, rho, u, v, h, n_points, scheme='central'):
+    gamma, rho, u, v = [mesh_field(f, n_points, h) for f in (gamma, rho, u, v)]
+    F_x = rho*u*h
+    F_y = rho*v*h
+    mean = lambda a, b: 0.5*(a + b)
+    harmonic = lambda a, b: 2*a*b/(a + b)
+    c = (slice(1,-1), slice(1,-1)) #the points interior to the domain
+    return face_coefficients(harmonic(gamma[c], gamma[2:,1:-1]), harmonic(gamma[c], gamma[:-2,1:-1]),
+                             harmonic(gamma[c], gamma[1:-1,2:]), harmonic(gamma[c], gamma[1:-1,:-2]),
+                             mean(F_x[c], F_x[2:,1:-1]), mean(F_x[c], F_x[:-2,1:-1]),
+                             mean(F_y[c], F_y[1:-1,2:]), mean(F_y[c], F_y[1:-1,:-2]), scheme)
+
+
+#the governing equation for steady convection diffusion solved with a Jacobi update
+#coefficients is the tuple (a_E, a_W, a_N, a_S, a_P) returned by convection_diffusion_coefficients or convection_diffusion_fields
+def convection_diffusion_update(T, T_new, coefficients):
+    a_E, a_W, a_N, a_S, a_P = coefficients
+    T_new[...,1:-1,1:-1] = ((a_E*T[...,2:,1:-1]) + (a_W*T[...,:-2,1:-1]) + (a_N*T[...,1:-1,2:]) + (a_S*T[...,1:-1,:-2]))/a_P
+
+
+
+#sums the absolute difference between the old and new values of the points interior to the domain
+def residual(y, y_new):
+    return float(np.sum(np.abs(y[1:-1,1:-1] - y_new[1:-1,1:-1])))
+
+
+
+#keeps applying 'update' until the error is less than error_req
+#update is called as update(y, y_new) and must only write to the points interior to the domain of y_new
+#rather than copying y_new back into y after every iteration the two arrays simply swap roles
+#callback (if given) is called as callback(iterations, y, error) after each iteration, where y already holds the new values
+#monitor (if given) is an instrumentation.Monitor that times each phase of the iteration and records metrics every monitor.every iterations
+#iterations and error_track let a run carry on from a checkpoint (see checkpoint.py), y is then the field saved at that point
+#returns the converged field, the number of iterations and the list tracking how the error changed with each iteration
+def solve(y, update, error_req=1e-6, max_iterations=None, callback=None, monitor=None, iterations=0, error_track=None):
+    y = np.array(y, copy=True) #the caller's array is left untouched
+    y_new = y.copy() #the second buffer starts with the same boundary conditions as y
+
+    error_track = [] if error_track is None else list(error_track)
+    error = error_req + 1 if not error_track else error_track[-1] #just to make sure its value is greater than error_req on a fresh run
+    if monitor is not None:
+        monitor.start(y, iterations)
+
+    while error > error_req:
+        if max_iterations is not None and iterations >= max_iterations:
+            break
+
+        t0 = time.perf_counter()
+        update(y, y_new)
+        t1 = time.perf_counter()
+        iterations = iterations + 1
+        error = residual(y, y_new)
+        error_track.append(error)
+        t2 = time.perf_counter()
+
+        y, y_new = y_new, y #y now holds the newest values and the old array is reused on the next iteration
+
+        if monitor is not None:
+            monitor.add(t1 - t0, t2 - t1, time.perf_counter() - t2)
+            if iterations % monitor.every == 0:
+                monitor.record(iterations, y_new, y, error)
+
+        if callback is not None:
+            callback(iterations, y, error)
+
+    if monitor is not None and error_track:
+        monitor.record(iterations, y_new, y, error) #the last iteration is always recorded
+
+    return y, iterations, error_track
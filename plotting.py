@@ -0,0 +1,135 @@
+import concurrent.futures
+import multiprocessing
+import os
+import numpy as np
+
+#This module draws the figures of the scripts, either on screen or (for batch runs on machines without a display) straight into files
+#matplotlib is only imported by the functions that draw, so a run that produces no figures never imports it
+#   grid        - the X, Y coordinates of every point of the mesh, built straight from the spacing of the points
+#   decimate    - cuts a long error_track down to a few thousand points before it is plotted
+#   Renderer    - writes contour, convergence and sweep plots to png files from a background worker, so the next solve can run while they are drawn
+#
+#the Renderer's worker is a separate process where 'fork' is available (matplotlib is then never imported by the process doing the solving)
+#and a thread otherwise, since the scripts have no if __name__ == '__main__': guard and a spawned process would run them again
+#the worker draws with matplotlib's Figure objects rather than pyplot, so it needs no display and does not touch the figures of the script
+
+max_points = 5000 #the most points a convergence plot is given, longer error tracks are decimated
+
+
+
+#the X and Y coordinates of every point of an npoints by npoints mesh with spacing h (the first index of X and Y follows y, as np.meshgrid does)
+#h may also be the array of the positions of the points of a stretched mesh (see stretched.py)
+def grid(npoints, h):
+    dom = np.arange(npoints)*h if np.ndim(h) == 0 else np.asarray(h) #the position of each point along a row (or column) of the plate
+    return np.meshgrid(dom, dom)
+
+
+#the time of each iteration of an error_track (iteration i finishes at i*dt, as in the scripts)
+def iteration_times(n_iterations, dt):
+    return dt*np.arange(n_iterations)
+
+
+#cuts times and errors down to at most max_points points by splitting them into bins of consecutive iterations
+#each bin is replaced by its largest error (placed at the start of the bin) and its smallest error (placed at the end of the bin),
+#so the envelope of the curve, including any spikes, is kept while most of the points are dropped
+def decimate(times, errors, max_points=max_points):
+    times = np.asarray(times, dtype=np.float64)
+    errors = np.asarray(errors, dtype=np.float64)
+    if len(errors) <= max_points:
+        return times, errors
+    width = -(-len(errors)//(max_points//2)) #two points are kept for every bin
+    starts = np.arange(0, len(errors), width)
+    ends = np.append(starts[1:], len(errors)) - 1
+    highs = np.maximum.reduceat(errors, starts)
+    lows = np.minimum.reduceat(errors, starts)
+    return np.column_stack((times[starts], times[ends])).ravel(), np.column_stack((highs, lows)).ravel()
+
+
+
+#draws the convergence plot of the scripts onto a matplotlib Axes
+def draw_convergence(ax, times, errors):
+    ax.scatter(times, errors, color="red", s=1)
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("error (no units)")
+    ax.set_title("how error changes with respect to time")
+
+
+#draws the contour plot of the scripts onto a matplotlib Axes and adds its colour bar to figure
+def draw_contour(figure, ax, field, h, title):
+    X, Y = grid(field.shape[0], h)
+    m = ax.contourf(X, Y, field, 20, cmap='plasma')
+    figure.colorbar(m, ax=ax)
+    ax.set_xlabel("Length of the plate along the x-axis (m)")
+    ax.set_ylabel("Length of the plate along the y-axis (m)")
+    ax.set_title(title)
+
+
+#the work done by the background worker: draws one figure and writes it to path
+def render(path, kind, *args):
+    from matplotlib.figure import Figure
+    figure = Figure()
+    ax = figure.subplots()
+    if kind == 'contour':
+        draw_contour(figure, ax, *args)
+    elif kind == 'sweep':
+        from sweep import plot_sweep
+        plot_sweep(*args, ax=ax)
+    else:
+        draw_convergence(ax, *args)
+    figure.savefig(path)
+    return path
+
+
+
+class Renderer:
+
+    def __init__(self, directory='plots', max_points=max_points):
+        self.directory = directory
+        self.max_points = max_points
+        os.makedirs(directory, exist_ok=True)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork'))
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.futures = []
+
+
+    def path(self, name):
+        return os.path.join(self.directory, name + ".png")
+
+
+    #queues a contour plot of field (npoints by npoints with spacing h, or with the points at the positions h) to be written to directory/name.png
+    def contour(self, name, field, h, title):
+        self.futures.append(self.executor.submit(render, self.path(name), 'contour', np.array(field), h, title))
+
+
+    #queues the convergence plot of an error_track to be written to directory/name.png, the error_track is decimated first
+    def convergence(self, name, error_track, dt):
+        times, errors = decimate(iteration_times(len(error_track), dt), error_track, self.max_points)
+        self.futures.append(self.executor.submit(render, self.path(name), 'convergence', times, errors))
+
+
+    #queues the plot of the 'time to converge' of a sweep (see sweep.plot_sweep) to be written to directory/name.png
+    def sweep(self, name, results, x='gamma'):
+        self.futures.append(self.executor.submit(render, self.path(name), 'sweep', results, x))
+
+
+    #waits for every queued figure to be written and returns their paths (an error raised while drawing is raised here)
+    def wait(self):
+        paths = [future.result() for future in self.futures]
+        self.futures = []
+        return paths
+
+
+    def close(self):
+        try:
+            return self.wait()
+        finally:
+            self.executor.shutdown()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,156 @@
+import os
+import json
+import numpy as np
+
+#This module stores the temperature distribution of an unsteady run on disk as the run goes, instead of keeping every timestep in memory
+#the frames are written into preallocated, memory-mapped .npy files that each hold chunk_size frames, so the history can grow without limit
+#every sets how often a frame is kept (e.g. every=10 keeps timesteps 0, 10, 20, ...), append(..., force=True) keeps a frame whatever its timestep (e.g. the last one)
+#keep_last=K turns the store into a ring buffer that only ever holds the last K frames that were kept
+#a frame is read back by its timestep (store[timestep]) and only that frame is loaded from disk
+
+meta_name = "meta.json"
+timesteps_name = "timesteps.npy"
+
+
+
+class SnapshotStore:
+
+    #creates a new store in the folder path for frames of the given shape (any previous store in that folder is replaced)
+    def __init__(self, path, shape, every=1, keep_last=None, chunk_size=None, dtype=np.float64):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.every = int(every)
+        self.keep_last = None if keep_last is None else int(keep_last)
+        if chunk_size is None:
+            chunk_size = max(1, 2**26//(int(np.prod(self.shape))*self.dtype.itemsize)) #about 64 MB per file
+        if self.keep_last is not None:
+            chunk_size = min(chunk_size, self.keep_last)
+        self.chunk_size = int(chunk_size)
+
+        self.slot_timesteps = [] #the timestep held in each slot (-1 for an empty slot)
+        self.slots = {} #the slot holding each timestep
+        self.count = 0 #the number of frames kept so far (including any overwritten by the ring buffer)
+        self.chunks = {} #the open memory maps, one per chunk file
+        self.writable = True
+
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("frames_") or name in (meta_name, timesteps_name):
+                os.remove(os.path.join(path, name))
+        self.write_meta()
+
+
+    #opens an existing store for reading
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, meta_name)) as file:
+            meta = json.load(file)
+        store = cls.__new__(cls)
+        store.path = path
+        store.shape = tuple(meta['shape'])
+        store.dtype = np.dtype(meta['dtype'])
+        store.every = meta['every']
+        store.keep_last = meta['keep_last']
+        store.chunk_size = meta['chunk_size']
+        store.count = meta['count']
+        store.slot_timesteps = np.load(os.path.join(path, timesteps_name)).tolist()
+        store.slots = {timestep: slot for slot, timestep in enumerate(store.slot_timesteps) if timestep >= 0}
+        store.chunks = {}
+        store.writable = False
+        return store
+
+
+    def write_meta(self):
+        meta = {'shape': list(self.shape), 'dtype': self.dtype.str, 'every': self.every, 'keep_last': self.keep_last,
+                'chunk_size': self.chunk_size, 'count': self.count}
+        with open(os.path.join(self.path, meta_name), "w") as file:
+            json.dump(meta, file)
+        np.save(os.path.join(self.path, timesteps_name), np.array(self.slot_timesteps, dtype=np.int64))
+
+
+    def chunk(self, number):
+        if number not in self.chunks:
+            name = os.path.join(self.path, "frames_"+str(number).zfill(6)+".npy")
+            if self.writable and not os.path.exists(name):
+                self.chunks[number] = np.lib.format.open_memmap(name, mode='w+', dtype=self.dtype, shape=(self.chunk_size,)+self.shape)
+            else:
+                self.chunks[number] = np.load(name, mmap_mode='r+' if self.writable else 'r')
+        return self.chunks[number]
+
+
+    #keeps the frame if the timestep is a multiple of every (or force is True) and returns whether it was kept
+    #a timestep that is already kept is not stored a second time
+    def append(self, timestep, frame, force=False):
+        if not self.writable:
+            raise ValueError("the snapshot store in "+self.path+" was opened for reading")
+        if (timestep % self.every != 0 and not force) or timestep in self.slots:
+            return False
+
+        slot = self.count if self.keep_last is None else self.count % self.keep_last
+        if slot == len(self.slot_timesteps):
+            self.slot_timesteps.append(-1)
+        old = self.slot_timesteps[slot]
+        if old >= 0:
+            del self.slots[old] #the ring buffer drops the oldest frame
+
+        self.chunk(slot//self.chunk_size)[slot % self.chunk_size] = frame
+        self.slot_timesteps[slot] = timestep
+        self.slots[timestep] = slot
+        self.count = self.count + 1
+        return True
+
+
+    #the timesteps that can be read back, oldest first
+    @property
+    def timesteps(self):
+        return sorted(self.slots)
+
+
+    def __len__(self):
+        return len(self.slots)
+
+
+    def __contains__(self, timestep):
+        return timestep in self.slots
+
+
+    #the frame stored for a timestep (a KeyError is raised if that timestep was not kept)
+    def __getitem__(self, timestep):
+        if timestep < 0: #negative timesteps count back from the last frame kept, like a list
+            timestep = self.timesteps[timestep]
+        if timestep not in self.slots:
+            raise KeyError("timestep "+str(timestep)+" was not kept (every="+str(self.every)+", keep_last="+str(self.keep_last)+")")
+        slot = self.slots[timestep]
+        return np.array(self.chunk(slot//self.chunk_size)[slot % self.chunk_size])
+
+
+    #the frame of the latest kept timestep at or before the one given
+    def nearest(self, timestep):
+        earlier = [t for t in self.slots if t <= timestep]
+        if not earlier:
+            raise KeyError("no timestep at or before "+str(timestep)+" was kept")
+        return self[max(earlier)]
+
+
+    #makes sure everything written so far is on disk, so the store can be opened by another process
+    def flush(self):
+        for chunk in self.chunks.values():
+            if isinstance(chunk, np.memmap) and self.writable:
+                chunk.flush()
+        if self.writable:
+            self.write_meta()
+
+
+    def close(self):
+        self.flush()
+        self.chunks = {}
+        self.writable = False
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,124 @@
+import math
+import numpy as np
+
+#This module solves the steady plate problems with red-black successive over-relaxation (SOR)
+#the five point system a_P*T_P = a_E*T_E + a_W*T_W + a_N*T_N + a_S*T_S is relaxed in place on a single array (no y_new is needed)
+#the points interior to the domain are split like a chess board so every 'red' point only has 'black' neighbours and vice versa,
+#each colour is updated with whole-array slicing and the change is stretched by the over-relaxation factor omega (omega = 1 is Gauss-Seidel)
+#with the best omega the number of iterations grows like npoints instead of npoints^2 for Jacobi
+#the coefficients may be scalars or (npoints-2, npoints-2) arrays holding one value per interior point
+
+#the coefficients of '2D steady state diffusion.py' (each point is the average of its four neighbours)
+diffusion_coefficients = (1.0, 1.0, 1.0, 1.0, 4.0)
+
+
+
+#the Jacobi spectral radius of the five point system with constant coefficients on a square plate with npoints along each edge
+#returns None when it cannot be worked out this way (coefficient arrays, or a_E*a_W < 0 which happens once the cell Peclet number passes 2)
+def jacobi_spectral_radius(npoints, coefficients):
+    a_E, a_W, a_N, a_S, a_P = coefficients
+    if any(np.ndim(a) > 0 for a in coefficients) or a_E*a_W < 0 or a_N*a_S < 0:
+        return None
+    return 2*(math.sqrt(a_E*a_W) + math.sqrt(a_N*a_S))*math.cos(math.pi/(npoints-1))/a_P
+
+
+#the best over-relaxation factor for a given Jacobi spectral radius
+def optimal_omega(rho_jacobi):
+    return 2/(1 + math.sqrt(max(0.0, 1 - rho_jacobi*rho_jacobi)))
+
+
+#the value of a coefficient at the points of one colour starting at (si, sj) of a block with the given number of rows and columns
+def part(a, si, sj, rows, n):
+    return a if np.ndim(a) == 0 else a[si-1:rows-2:2, sj-1:n-2:2]
+
+
+#relaxes the points of one colour of y in place (colour 0 is red and colour 1 is black), returns the sum of the absolute change
+#row_offset is the row of the full plate that row 0 of y sits on, so a strip of the plate (as used by parallel.py) keeps the colours of the full plate
+def sor_colour(y, coefficients, omega, colour, row_offset=0):
+    n = y.shape[1]
+    rows = y.shape[0]
+    a_E, a_W, a_N, a_S, a_P = coefficients
+    error = 0.0
+    offsets = ((1,1),(2,2)) if (colour + row_offset) % 2 == 0 else ((1,2),(2,1)) #a red point has an even sum of row and column
+    for si, sj in offsets:
+        new = ((part(a_E,si,sj,rows,n)*y[si+1:rows:2, sj:n-1:2]) + (part(a_W,si,sj,rows,n)*y[si-1:rows-2:2, sj:n-1:2])
+               + (part(a_N,si,sj,rows,n)*y[si:rows-1:2, sj+1:n:2]) + (part(a_S,si,sj,rows,n)*y[si:rows-1:2, sj-1:n-2:2]))/part(a_P,si,sj,rows,n)
+        change = omega*(new - y[si:rows-1:2, sj:n-1:2])
+        y[si:rows-1:2, sj:n-1:2] += change
+        error = error + float(np.sum(np.abs(change)))
+    return error
+
+
+#one red-black SOR sweep over y (in place), returns the sum of the absolute change of every interior point
+def sor_sweep(y, coefficients, omega):
+    return sor_colour(y, coefficients, omega, 0) + sor_colour(y, coefficients, omega, 1)
+
+
+#every 'window' sweeps the rate lam at which the error is falling is measured on both halves of the window
+#once the two agree (the start-up transients have died away) lam gives an estimate of the Jacobi spectral radius:
+#for SOR with the current omega, lam + omega - 1 = omega*rho_jacobi*sqrt(lam), and from that the best omega
+#the estimate is on the low side while omega is below the best value, so omega only ever moves up towards it
+#returns the omega to use from now on
+def adapt_omega(error_track, omega, window=20, settle=1e-3):
+    if len(error_track) == 0 or len(error_track) % window != 0:
+        return omega
+    recent = np.array(error_track[-window:])
+    if np.all(recent > 0):
+        rates = np.log(recent[1:]/recent[:-1])
+        lam_first = float(np.exp(np.mean(rates[:window//2])))
+        lam = float(np.exp(np.mean(rates[window//2:])))
+        if 0 < lam < 1 and abs(lam - lam_first) < settle*lam:
+            rho = (lam + omega - 1)/(omega*math.sqrt(lam))
+            omega = max(omega, optimal_omega(min(rho, 1.0)))
+    return omega
+
+
+
+#works out the starting omega and whether it should be adapted as the run goes (see sor_solve)
+#start_omega (if given) is the omega a resumed run had reached, it replaces the starting omega but an adaptive run keeps adapting
+def initial_omega(npoints, coefficients, omega, start_omega=None):
+    if omega == 'grid':
+        rho = jacobi_spectral_radius(npoints, coefficients)
+        omega, adaptive = (optimal_omega(rho), False) if rho is not None else (1.0, True)
+    elif omega == 'adaptive':
+        omega, adaptive = 1.0, True
+    else:
+        omega, adaptive = float(omega), False
+    return (omega if start_omega is None else float(start_omega)), adaptive
+
+
+
+#relaxes the five point system until the sum of the absolute change of the interior points in one sweep is less than error_req
+#omega may be a number, 'grid' to work it out from the size of the plate and the coefficients,
+#or 'adaptive' to start from Gauss-Seidel (omega = 1) and keep improving omega from the rate at which the error is observed to fall
+#('grid' falls back to 'adaptive' when the spectral radius cannot be worked out from the coefficients)
+#callback (if given) is called as callback(iterations, y, error) after each sweep,
+#a callback with an omega attribute (such as checkpoint.Checkpointer) has it set to the omega in use first, so it can be saved with the field
+#iterations, error_track and start_omega let a run carry on from a checkpoint (see checkpoint.py), y is then the field saved at that point
+#and start_omega the omega that run had reached (checkpoint.load_omega), an adaptive run carries on adapting from it instead of from 1
+#returns the converged field, the number of sweeps, the list tracking how the error changed with each sweep and the omega used
+def sor_solve(y, coefficients=diffusion_coefficients, error_req=1e-6, omega='grid', max_iterations=None, callback=None, window=20, settle=1e-3, iterations=0, error_track=None, start_omega=None):
+    y = np.array(y, dtype=np.float64, copy=True) #the caller's array is left untouched
+    n = y.shape[0]
+
+    omega, adaptive = initial_omega(n, coefficients, omega, start_omega)
+
+    error_track = [] if error_track is None else list(error_track)
+    error = error_req + 1 if not error_track else error_track[-1] #just to make sure its value is greater than error_req on a fresh run
+    while error > error_req:
+        if max_iterations is not None and iterations >= max_iterations:
+            break
+
+        error = sor_sweep(y, coefficients, omega)
+        iterations = iterations + 1
+        error_track.append(error)
+
+        if adaptive:
+            omega = adapt_omega(error_track, omega, window, settle)
+
+        if callback is not None:
+            if hasattr(callback, 'omega'):
+                callback.omega = omega
+            callback(iterations, y, error)
+
+    return y, iterations, error_track, omega
@@ -0,0 +1,100 @@
+import functools
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+#This module solves the five point system of '2D steady convection diffusion.py' in a single step
+#instead of relaxing a_P*T_P = a_E*T_E + a_W*T_W + a_N*T_N + a_S*T_S point by point, every point interior to the domain becomes one row of a sparse matrix
+#the boundary values do not appear in the matrix, they are moved onto the right hand side
+#this means the matrix (and its LU factorization) only depends on the coefficients, so it can be reused for any set of boundary values
+#the interior point T[i,j] is unknown number (i-1)*m + (j-1) where m = n_points-2, so the E/W neighbours are m apart and the N/S neighbours are 1 apart
+#the coefficients may be scalars or (n_points-2, n_points-2) arrays holding one value per interior point
+
+
+
+#builds the (m*m, m*m) CSR matrix of the system for a plate with n_points along each edge
+def assemble_matrix(n_points, coefficients):
+    m = n_points - 2
+    a_E, a_W, a_N, a_S, a_P = [np.broadcast_to(np.asarray(a, dtype=np.float64), (m,m)) for a in coefficients]
+
+    #the links to neighbours that lie on the boundary are dropped, they belong to the right hand side
+    a_E = np.where(np.arange(m)[:,None] < m-1, a_E, 0)
+    a_W = np.where(np.arange(m)[:,None] > 0, a_W, 0)
+    a_N = np.where(np.arange(m)[None,:] < m-1, a_N, 0)
+    a_S = np.where(np.arange(m)[None,:] > 0, a_S, 0)
+
+    #each diagonal is shifted so that entry k lines up with the column it lands in
+    diagonals = [a_P.ravel(), -a_E.ravel()[:-m], -a_W.ravel()[m:], -a_N.ravel()[:-1], -a_S.ravel()[1:]]
+    return sp.diags(diagonals, [0, m, -m, 1, -1], shape=(m*m, m*m), format='csr')
+
+
+#the right hand side of the system: the part of a_E*T_E + a_W*T_W + a_N*T_N + a_S*T_S that comes from boundary points
+#T can be a single (n_points, n_points) plate or a (B, n_points, n_points) stack of plates with different boundary values
+#only the boundary values of T are used, the result has one column per plate
+def assemble_rhs(T, coefficients):
+    a_E, a_W, a_N, a_S, a_P = coefficients
+    Z = np.array(T, dtype=np.float64, copy=True)
+    Z[...,1:-1,1:-1] = 0 #only the boundary values are kept
+    b = (a_E*Z[...,2:,1:-1]) + (a_W*Z[...,:-2,1:-1]) + (a_N*Z[...,1:-1,2:]) + (a_S*Z[...,1:-1,:-2])
+    m = T.shape[-1] - 2
+    return b.reshape(-1, m*m).T
+
+
+#the sparse LU factorization of the system
+#it is cached on the number of points and the coefficients, so solving the same plate again with different boundary values skips straight to the (cheap) triangular solves
+#coefficient arrays cannot be cached this way, in that case keep the returned factorization and pass it to sparse_solve yourself
+def lu_factorize(n_points, coefficients):
+    try:
+        return cached_lu(n_points, tuple(float(a) for a in coefficients))
+    except TypeError: #the coefficients are arrays
+        return spla.splu(assemble_matrix(n_points, coefficients).tocsc())
+
+
+@functools.lru_cache(maxsize=16)
+def cached_lu(n_points, coefficients):
+    return spla.splu(assemble_matrix(n_points, coefficients).tocsc())
+
+
+
+#solves the five point system for the boundary values held in T (a single plate or a stack of plates)
+#method is 'lu' for a direct solve, or 'bicgstab' / 'gmres' for a Krylov solve preconditioned with an incomplete LU factorization
+#factor lets a factorization from lu_factorize be reused directly, and tol is the relative residual the Krylov methods must reach
+#returns T with the points interior to the domain filled in, and the relative residual after each iteration (a single entry for 'lu')
+def sparse_solve(T, coefficients, method='lu', factor=None, tol=1e-10, max_iterations=1000):
+    T = np.array(T, dtype=np.float64, copy=True)
+    n_points = T.shape[-1]
+    m = n_points - 2
+    b = assemble_rhs(T, coefficients)
+    b_norm = np.linalg.norm(b, axis=0)
+    b_norm[b_norm == 0] = 1 #a plate with all boundaries at 0 C has the trivial solution
+
+    if method == 'lu':
+        if factor is None:
+            factor = lu_factorize(n_points, coefficients)
+        x = factor.solve(b) #every plate in the stack is solved with the same factorization
+        A = assemble_matrix(n_points, coefficients)
+        residual_history = [float(np.max(np.linalg.norm(b - A @ x, axis=0)/b_norm))]
+    elif method in ('bicgstab', 'gmres'):
+        A = assemble_matrix(n_points, coefficients)
+        ilu = spla.spilu(A.tocsc(), drop_tol=1e-3)
+        M = spla.LinearOperator(A.shape, ilu.solve)
+        krylov = spla.bicgstab if method == 'bicgstab' else spla.gmres
+        x = np.zeros_like(b)
+        residual_history = []
+        for k in range(b.shape[1]): #the Krylov methods take one right hand side at a time
+            history = []
+            if method == 'gmres':
+                #gmres reports the (preconditioned) relative residual after every inner iteration
+                x[:,k], info = krylov(A, b[:,k], rtol=tol, maxiter=max_iterations, M=M, callback=lambda r: history.append(float(r)), callback_type='pr_norm')
+            else:
+                x[:,k], info = krylov(A, b[:,k], rtol=tol, maxiter=max_iterations, M=M, callback=lambda xk: history.append(float(np.linalg.norm(b[:,k] - A @ xk)/b_norm[k])))
+            if info > 0:
+                raise RuntimeError(method+" did not reach a relative residual of "+str(tol)+" in "+str(max_iterations)+" iterations")
+            #the history of the slowest plate in the stack is the one reported
+            if len(history) > len(residual_history):
+                residual_history = history
+    else:
+        raise ValueError("method must be 'lu', 'bicgstab' or 'gmres', not "+repr(method))
+
+    T[...,1:-1,1:-1] = x.T.reshape(T.shape[:-2] + (m,m))
+    return T, residual_history
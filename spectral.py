@@ -0,0 +1,43 @@
+import time
+import numpy as np
+import scipy.fft
+
+#This module solves the steady state heat diffusion problem of '2D steady state diffusion.py' directly with discrete sine transforms
+#the equation is the same as in multigrid.py: -(d^2y/dx^2 + d^2y/dy^2) = f on the points interior to the domain with the boundary values of y held fixed
+#the boundary values next to the interior points are moved onto the right hand side, which leaves the five point system with zero boundary values
+#the sine functions sin(k*pi*i/(n-1)) are the eigenvectors of that system, so a DST-I turns it into one independent equation per pair of wave numbers:
+#the transformed right hand side is divided by the eigenvalues and transformed back, in O(npoints^2 log npoints) and with no iteration at all
+#the answer is the exact solution of the five point system (to rounding), so it can also be used to check the iterative solvers
+#y may be a single plate or a stack of plates (B, nx, ny), the plates do not have to be square but the spacing h is the same along both axes
+
+
+
+#the eigenvalues of the one dimensional second difference (2y_i - y_(i-1) - y_(i+1)) with zero values at both ends, for m interior points
+def eigenvalues(m):
+    return 2 - 2*np.cos(np.pi*np.arange(1, m+1)/(m+1))
+
+
+#h^2 f plus the boundary values next to the points interior to the domain (the right hand side of the system with zero boundary values)
+def boundary_rhs(y, f, h):
+    b = np.zeros(y[...,1:-1,1:-1].shape)
+    if f is not None:
+        b += h*h*np.broadcast_to(np.asarray(f, dtype=np.float64), y.shape)[...,1:-1,1:-1]
+    b[...,0,:] += y[...,0,1:-1]
+    b[...,-1,:] += y[...,-1,1:-1]
+    b[...,:,0] += y[...,1:-1,0]
+    b[...,:,-1] += y[...,1:-1,-1]
+    return b
+
+
+#solves the plate directly, f (optional) is the source term as a number or an array with one value per point (f = 0 is the Laplace equation)
+#workers is the number of threads scipy.fft may use (all cores with -1)
+#returns the solution (the boundary values of y are kept) and the time taken in seconds
+def spectral_solve(y, h, f=None, workers=None):
+    start = time.perf_counter()
+    y = np.array(y, dtype=np.float64, copy=True) #the caller's array is left untouched
+    b = boundary_rhs(y, f, h)
+    mx, my = b.shape[-2], b.shape[-1]
+    b_hat = scipy.fft.dstn(b, type=1, axes=(-2,-1), workers=workers)
+    b_hat /= eigenvalues(mx)[:,None] + eigenvalues(my)[None,:]
+    y[...,1:-1,1:-1] = scipy.fft.idstn(b_hat, type=1, axes=(-2,-1), workers=workers)
+    return y, time.perf_counter() - start
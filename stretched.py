@@ -0,0 +1,73 @@
+import numpy as np
+from plate_solver import face_coefficients
+
+#This module sets up rectangular meshes whose points are packed closer together near the edges of the plate
+#the steep gradients of the plates are at the corners where a 1 C edge meets a 0 C edge and in the boundary layers along the edges,
+#so a stretched mesh resolves them with far fewer points than refining a uniform mesh everywhere
+#the points along each axis are given as arrays, the first index runs along x_points and the second along y_points (as in the scripts)
+#the equations are written for the control volume around each point, with the faces halfway between neighbouring points
+#the coefficients are (nx-2, ny-2) arrays and can be handed to plate_solver.convection_diffusion_update, sor.sor_solve
+#and (for square plates) sparse_solver.sparse_solve, exactly like the coefficients of a uniform mesh
+
+
+
+#the positions of npoints points from 0 to length packed together towards one or both ends with a tanh stretching
+#beta sets how strongly the points are packed (0 gives a uniform mesh, 2 to 3 is typical)
+#ends is 'both', 'start' (towards 0) or 'end' (towards length)
+def stretched_points(npoints, length=1.0, beta=0.0, ends='both'):
+    if beta == 0:
+        return np.linspace(0, length, npoints)
+    if ends == 'both':
+        s = np.linspace(-1, 1, npoints)
+        x = 0.5*length*(1 + np.tanh(beta*s)/np.tanh(beta))
+    elif ends in ('start', 'end'):
+        s = np.linspace(0, 1, npoints)
+        x = length*(1 + np.tanh(beta*(s - 1))/np.tanh(beta))
+        if ends == 'end':
+            x = length - x[::-1]
+    else:
+        raise ValueError("ends must be 'both', 'start' or 'end', not "+repr(ends))
+    x[0], x[-1] = 0.0, length #removes the rounding error at the two ends
+    return x
+
+
+#the values of f at every point of the mesh as an (nx, ny) array
+#f may be a number (the same everywhere), an array that already holds one value per point or a function f(x, y)
+def point_values(f, x_points, y_points):
+    if callable(f):
+        f = f(x_points[:,None], y_points[None,:])
+    return np.array(np.broadcast_to(np.asarray(f, dtype=np.float64), (len(x_points), len(y_points))))
+
+
+#the coefficients of the steady convection diffusion equation on a stretched mesh
+#gamma, rho, u and v may each be a number, an (nx, ny) array or a function f(x, y) (see point_values)
+#scheme is one of plate_solver.differencing ('central', 'upwind', 'hybrid' or 'power_law')
+#with gamma = 1 and rho*u = rho*v = 0 this is the steady state heat diffusion problem of '2D steady state diffusion.py'
+#on a uniform mesh the coefficients are the same as those of plate_solver.convection_diffusion_fields
+def stretched_coefficients(x_points, y_points, gamma=1.0, rho=1.0, u=0.0, v=0.0, scheme='central'):
+    x_points = np.asarray(x_points, dtype=np.float64)
+    y_points = np.asarray(y_points, dtype=np.float64)
+    gamma, rho, u, v = [point_values(f, x_points, y_points) for f in (gamma, rho, u, v)]
+
+    dx = np.diff(x_points) #the distance between neighbouring points along each axis
+    dy = np.diff(y_points)
+    width_x = (0.5*(dx[:-1] + dx[1:]))[:,None] #the size of the control volume of each interior point
+    width_y = (0.5*(dy[:-1] + dy[1:]))[None,:]
+
+    mean = lambda a, b: 0.5*(a + b)
+    harmonic = lambda a, b: 2*a*b/(a + b)
+    c = (slice(1,-1), slice(1,-1)) #the points interior to the domain
+    flux_x = rho*u
+    flux_y = rho*v
+
+    #diffusion through each face: gamma times the length of the face over the distance between the two points either side
+    D_e = harmonic(gamma[c], gamma[2:,1:-1])*width_y/dx[1:,None]
+    D_w = harmonic(gamma[c], gamma[:-2,1:-1])*width_y/dx[:-1,None]
+    D_n = harmonic(gamma[c], gamma[1:-1,2:])*width_x/dy[None,1:]
+    D_s = harmonic(gamma[c], gamma[1:-1,:-2])*width_x/dy[None,:-1]
+    #convection through each face: rho*u (or rho*v) times the length of the face
+    F_e = mean(flux_x[c], flux_x[2:,1:-1])*width_y
+    F_w = mean(flux_x[c], flux_x[:-2,1:-1])*width_y
+    F_n = mean(flux_y[c], flux_y[1:-1,2:])*width_x
+    F_s = mean(flux_y[c], flux_y[1:-1,:-2])*width_x
+    return face_coefficients(D_e, D_w, D_n, D_s, F_e, F_w, F_n, F_s, scheme)
@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import itertools
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from plate_solver import convection_diffusion_coefficients, convection_diffusion_update, solve
+from ensemble import make_ensemble, ensemble_coefficients, ensemble_solve
+
+#This module runs the plate of '2D steady convection diffusion.py' for many combinations of gamma, u, v, n_points and dt
+#the cases are shared out over a pool of processes (one per core by default)
+#the workers are started with 'fork' where it is available (as in parallel.py), so they are copies of the calling process and never re-import the script
+#every finished case is written to its own small JSON file in cache_dir, named after a hash of its parameters
+#running the same sweep again (or a bigger sweep containing it) only computes the cases that are not in the cache yet
+#with batch=True the cases that share a mesh are instead solved together as one ensemble (see ensemble.py) in the calling process
+
+#the parameters that describe a case and their default values (the values used in '2D steady convection diffusion.py')
+defaults = {'gamma': 1.0, 'u': 0.0, 'v': 0.0, 'n_points': 34, 'dt': 0.0001, 'rho': 1.0, 'dom_length': 1.0, 'error_req': 1e-6, 'max_iterations': 100000}
+
+
+
+#fills in the defaults and puts every value in a standard form, so equal cases always give equal hashes (e.g. u = 1 and u = 1.0)
+def normalize(case):
+    unknown = set(case) - set(defaults)
+    if unknown:
+        raise ValueError("unknown sweep parameters: "+", ".join(sorted(unknown)))
+    full = dict(defaults, **case)
+    return {key: (int(full[key]) if key in ('n_points','max_iterations') else float(full[key])) for key in sorted(full)}
+
+
+#the name of the cache file of a case
+def case_hash(case):
+    return hashlib.sha1(json.dumps(normalize(case), sort_keys=True).encode()).hexdigest()
+
+
+#every combination of the values given (each argument may be a single value or a list of values)
+#when v is None it is tied to u, which is how the convergence tables in the script were made (u = v = 1, 2, 3 m/s)
+def parameter_grid(gamma, u, v=None, n_points=34, dt=0.0001):
+    as_list = lambda values: list(np.atleast_1d(values).tolist())
+    cases = []
+    for g, uu, n, d in itertools.product(as_list(gamma), as_list(u), as_list(n_points), as_list(dt)):
+        for vv in ([uu] if v is None else as_list(v)):
+            cases.append({'gamma': g, 'u': uu, 'v': vv, 'n_points': n, 'dt': d})
+    return cases
+
+
+
+#solves a single case from zero and returns its parameters together with the number of iterations and the time to converge
+def run_case(case):
+    case = normalize(case)
+    n_points = case['n_points']
+    h = case['dom_length']/(n_points-1)
+
+    T = np.zeros((n_points,n_points))
+    T[0,:] = 1 #the bottom row is held at a temperature of 1 C
+    T[:,0] = 1 #the leftmost column is held at a temperature of 1 C
+
+    coefficients = convection_diffusion_coefficients(case['gamma'], case['rho'], case['u'], case['v'], h)
+    T, iterations, error_track = solve(T, lambda T, T_new: convection_diffusion_update(T, T_new, coefficients), case['error_req'], case['max_iterations'])
+
+    result = dict(case)
+    result['iterations'] = iterations
+    result['time_to_converge'] = iterations*case['dt']
+    result['converged'] = bool(error_track) and error_track[-1] <= case['error_req']
+    return result
+
+
+#solves a list of cases together, the cases sharing n_points, dom_length, error_req and max_iterations go into one ensemble
+#returns the same results as run_case would for each case, in the same order
+def run_batch(cases):
+    cases = [normalize(case) for case in cases]
+    groups = {}
+    for index, case in enumerate(cases):
+        groups.setdefault((case['n_points'], case['dom_length'], case['error_req'], case['max_iterations']), []).append(index)
+
+    results = [None]*len(cases)
+    for (n_points, dom_length, error_req, max_iterations), indices in groups.items():
+        group = [cases[index] for index in indices]
+        T = make_ensemble(n_points, bottom=1, left=1, B=len(group)) #the bottom row and the leftmost column are held at a temperature of 1 C
+        coefficients = ensemble_coefficients(*([case[key] for case in group] for key in ('gamma', 'rho', 'u', 'v')), dom_length/(n_points-1))
+        T, iterations, error_tracks = ensemble_solve(T, convection_diffusion_update, (coefficients,), error_req, max_iterations)
+        for index, case, n, error_track in zip(indices, group, iterations.tolist(), error_tracks):
+            result = dict(case)
+            result['iterations'] = n
+            result['time_to_converge'] = n*case['dt']
+            result['converged'] = bool(error_track) and error_track[-1] <= error_req
+            results[index] = result
+    return results
+
+
+def load_cached(case, cache_dir):
+    path = os.path.join(cache_dir, case_hash(case)+".json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def store_cached(result, cache_dir):
+    case = {key: result[key] for key in defaults}
+    path = os.path.join(cache_dir, case_hash(case)+".json")
+    with open(path+".tmp", "w") as file:
+        json.dump(result, file, sort_keys=True)
+    os.replace(path+".tmp", path) #the file only appears once it is complete, so an interrupted sweep never leaves half a result behind
+
+
+
+#the start method of the worker processes: 'fork' where it is available, the platform's default otherwise
+def context():
+    return multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+
+
+#runs every case (a list of dictionaries such as the one made by parameter_grid) and returns the results in the same order
+#processes is the number of worker processes (all cores when None), cache_dir=None turns the cache off
+#batch=True solves the cases that are not cached as ensembles in this process instead (processes is then not used)
+#the pool uses 'fork' where it is available (Linux and macOS), so the workers do not run the calling script again
+#on Windows there is no 'fork' and the workers re-import the calling script, which then has to keep everything it runs under an if __name__ == '__main__': guard
+def sweep(cases, cache_dir='sweep_cache', processes=None, batch=False):
+    results = [None]*len(cases)
+    todo = []
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    for index, case in enumerate(cases):
+        cached = load_cached(case, cache_dir) if cache_dir is not None else None
+        if cached is None:
+            todo.append(index)
+        else:
+            results[index] = cached
+
+    #each result is stored as soon as it arrives, so an interrupted sweep keeps everything finished so far
+    def record(index, result):
+        results[index] = result
+        if cache_dir is not None:
+            store_cached(result, cache_dir)
+
+    processes = processes or os.cpu_count() or 1
+    if batch:
+        for index, result in zip(todo, run_batch([cases[index] for index in todo])):
+            record(index, result)
+    elif processes == 1 or len(todo) <= 1:
+        for index in todo:
+            record(index, run_case(cases[index]))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(processes, len(todo)), mp_context=context()) as pool:
+            for index, result in zip(todo, pool.map(run_case, [cases[index] for index in todo])):
+                record(index, result)
+
+    return results
+
+
+
+#turns the results into one table per velocity: {(u, v): (values of gamma, times to converge)} with gamma in increasing order
+def convergence_table(results, x='gamma'):
+    table = {}
+    for result in sorted(results, key=lambda result: result[x]):
+        xs, times = table.setdefault((result['u'], result['v']), ([], []))
+        xs.append(result[x])
+        times.append(result['time_to_converge'])
+    return table
+
+
+#prints the tables made by convergence_table
+def print_table(results, x='gamma'):
+    for (u, v), (xs, times) in convergence_table(results, x).items():
+        print("u = "+str(u)+" m/s, v = "+str(v)+" m/s")
+        for value, time in zip(xs, times):
+            print("    "+x+" = "+str(value)+"    time to converge = "+str(round(time, 6))+" s")
+
+
+#plots how the 'time to converge' changes with the diffusion coefficient, one set of points per velocity
+#ax is the matplotlib Axes to draw on, the current pyplot figure is used when it is None
+def plot_sweep(results, x='gamma', ax=None):
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.gca()
+    for (u, v), (xs, times) in convergence_table(results, x).items():
+        label = 'u = v = '+str(u)+' m/s' if u == v else 'u = '+str(u)+', v = '+str(v)+' m/s'
+        ax.scatter(xs, times, label=label)
+    ax.set_xlabel("diffusion coefficient (m^2/s)" if x == 'gamma' else x)
+    ax.set_ylabel("Time to converge (s)")
+    ax.set_title("how 'time to converge' changes with respect to "+str('\u0393')+" ")
+    ax.legend(loc='lower right')